@@ -0,0 +1,91 @@
+import asyncio
+import csv
+import aiohttp
+from utils.ats_boards import ADAPTERS_BY_NAME, boards_from_urls
+from utils.rate_limit import HostPacer
+from workday_search import save_jobs_to_file, save_jobs_to_json
+
+ATS_HEADERS = {
+    'Accept': 'application/json',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+}
+
+
+async def fetch_board(session, pacer, global_limit, adapter_name, slug):
+    """
+    Fetch one company's whole board in a single request.
+
+    Returns:
+    - list: Normalised job records ([] if the board is gone or the request failed).
+    """
+    adapter = ADAPTERS_BY_NAME[adapter_name]
+    url = adapter.board_url.format(slug=slug)
+    host = url.split('/')[2]
+    try:
+        async with pacer.semaphore(host):
+            await pacer.wait(host)
+            async with global_limit:
+                async with session.get(url) as response:
+                    if response.status == 404:
+                        print(f"  [{adapter_name}] No board for '{slug}'")
+                        return []
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"  [{adapter_name}] Error fetching '{slug}': {e}")
+        return []
+    jobs = adapter.parse(slug, data)
+    print(f"  [{adapter_name}] {slug}: {len(jobs)} jobs")
+    return jobs
+
+
+async def scrape_ats_boards(boards, max_concurrency=20, per_host_concurrency=4, per_host_delay=0.2, timeout=30):
+    """
+    Fetch every (adapter name, slug) board concurrently.
+
+    All boards of one ATS share an API host, so requests are paced per host
+    with the same HostPacer the Workday crawler uses.
+
+    Args:
+        boards: [(adapter name, slug)], e.g. from boards_from_urls().
+        max_concurrency: Requests in flight across all hosts.
+        per_host_concurrency: Requests in flight per API host.
+        per_host_delay: Minimum seconds between request starts on one host.
+        timeout: Total seconds allowed per request.
+
+    Returns:
+        List of normalised job records, in board order.
+    """
+    pacer = HostPacer(per_host_concurrency, per_host_delay)
+    global_limit = asyncio.Semaphore(max_concurrency)
+    connector = aiohttp.TCPConnector(limit=max_concurrency, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(headers=ATS_HEADERS, connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        results = await asyncio.gather(*(
+            fetch_board(session, pacer, global_limit, adapter_name, slug) for adapter_name, slug in boards
+        ))
+    return [job for jobs in results for job in jobs]
+
+
+def load_serp_urls(filename="google_search_urls.csv"):
+    """Read the result URLs exported by company_search_google"""
+    with open(filename, newline='', encoding='utf-8') as f:
+        return [row['url'] for row in csv.DictReader(f) if row.get('url')]
+
+
+if __name__ == "__main__":
+    # Configuration
+    SERP_CSV = "google_search_urls.csv"
+    MAX_CONCURRENCY = 20
+
+    boards = boards_from_urls(load_serp_urls(SERP_CSV))
+    print(f"Found {len(boards)} Greenhouse/Lever/Ashby boards in {SERP_CSV}.")
+
+    jobs = asyncio.run(scrape_ats_boards(boards, max_concurrency=MAX_CONCURRENCY))
+
+    if jobs:
+        save_jobs_to_file(jobs, "ats_jobs.txt", heading="ATS Board Job Listings")
+        save_jobs_to_json(jobs, "ats_jobs.json")
+        print(f"\nTotal jobs scraped: {len(jobs)} from {len(boards)} boards")
+    else:
+        print("No jobs found.")
@@ -0,0 +1,80 @@
+"""
+Benchmark the shared block detector against the old full-document scans.
+
+Usage:
+    python benchmarks/bench_block_detection.py [captured_pages_dir]
+
+Point it at a folder of saved pages (*.html, e.g. dumps of driver.page_source
+or SuperClient responses). Without one, it builds synthetic multi-megabyte
+pages: clean ones that mention "bot" and "challenge" in the body, plus
+Cloudflare, Google /sorry and reCAPTCHA block pages.
+"""
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.block_detection import detect_block
+
+LEGACY_INDICATORS = ["captcha", "challenge", "robot", "automated", "bot", "access denied", "blocked",
+                     "security check", "cloudflare", "distil", "datadome", "incapsula", "akamai",
+                     "perimeterx", "sorry we just need to make sure", "unusual traffic"]
+ROUNDS = 20
+
+
+def legacy_check(html):
+    """SuperClient._check_blocking_indicators before the shared detector"""
+    text_lower = html.lower()
+    return any(indicator in text_lower for indicator in LEGACY_INDICATORS)
+
+
+def synthetic_pages():
+    filler = "<div class='result'><p>Automation engineer building a chatbot to tackle a data challenge.</p></div>\n"
+    body = filler * 30000  # ~2.7 MB
+    return {
+        "clean_large.html": f"<html><head><title>Jobs</title></head><body>{body}</body></html>",
+        "cloudflare.html": "<html><head><title>Just a moment...</title>"
+                           "<script src='/cdn-cgi/challenge-platform/h/b/orchestrate/jsch/v1'></script>"
+                           "</head><body></body></html>",
+        "google_sorry.html": "<html><head><title>https://www.google.com/search</title></head><body>"
+                             "<form id=\"captcha-form\" action=\"/sorry/index\" method=\"post\">"
+                             "<div id=\"recaptcha\" class=\"g-recaptcha\" data-sitekey=\"x\"></div>"
+                             "</form></body></html>",
+        "recaptcha_large.html": "<html><head><title>Verify</title></head><body>"
+                                "<div class=\"g-recaptcha\"></div>" + body + "</body></html>",
+    }
+
+
+def load_pages(directory):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def bench(fn, html):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn(html)
+    return (time.perf_counter() - start) / ROUNDS * 1000, result
+
+
+if __name__ == "__main__":
+    pages = load_pages(sys.argv[1]) if len(sys.argv) > 1 else synthetic_pages()
+    if not pages:
+        sys.exit("No *.html pages found.")
+
+    print(f"{'page':<28}{'size':>10}{'legacy ms':>12}{'legacy':>9}{'new ms':>10}  signature")
+    total_legacy = total_new = 0.0
+    for name, html in pages.items():
+        legacy_ms, legacy_hit = bench(legacy_check, html)
+        new_ms, match = bench(lambda h: detect_block(h, "https://www.google.com/"), html)
+        total_legacy += legacy_ms
+        total_new += new_ms
+        print(f"{name:<28}{len(html):>10}{legacy_ms:>12.3f}{str(legacy_hit):>9}{new_ms:>10.3f}  "
+              f"{match.signature if match else '-'}")
+    print(f"\nTotal per pass: legacy {total_legacy:.2f} ms, detector {total_new:.2f} ms "
+          f"({total_legacy / max(total_new, 1e-9):.0f}x)")
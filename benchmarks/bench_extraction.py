@@ -0,0 +1,91 @@
+"""
+Parse-throughput benchmark for the schema-driven extractor.
+
+Usage:
+    python benchmarks/bench_extraction.py [copies] [workers]
+    python benchmarks/bench_extraction.py --dir archived_pages/ SCHEMA_NAME [workers]
+
+By default it parses `copies` (default 200) copies of every page in
+benchmarks/fixtures with the schema of the same name. For each schema it
+reports documents per second for the hand-written upwork_search loop the
+schema replaced (upwork_search only), the compiled schema in one process,
+and extract_many across a process pool. With --dir it re-parses a folder
+of archived *.html pages with one schema.
+"""
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selectolax.parser import HTMLParser
+
+from utils.extraction import extract_many, get_schema
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BASE_URL = "https://www.upwork.com/nx/search/jobs/"
+
+
+def legacy_upwork_search(html):
+    """upwork_search.py's parsing loop before it moved to the schema"""
+    jobs = []
+    for card in HTMLParser(html).css('section.card-list-container[data-test="JobsList"] article'):
+        title_node = card.css_first('[data-test="job-tile-title-link UpLink"]')
+        desc_node = card.css_first('[data-test="UpCLineClamp JobDescription"]')
+        if not title_node or not desc_node:
+            continue
+        a_tag = title_node.css_first("a")
+        jobs.append((title_node.text(strip=True), desc_node.text(strip=True),
+                     a_tag.attributes.get("href") if a_tag else BASE_URL))
+    return jobs
+
+
+def load_pages(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    return pages
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def report(label, seconds, docs, records):
+    print(f"  {label:<26}{docs / seconds:>10.0f} docs/s{seconds * 1000:>10.0f} ms  {records} records")
+
+
+def bench_schema(name, documents, workers):
+    schema = get_schema(name)
+    print(f"\n{name}: {len(documents)} documents, {sum(len(d) for d in documents) / 1e6:.1f} MB")
+
+    if name == "upwork_search":
+        seconds, results = timed(lambda: [legacy_upwork_search(html) for html in documents])
+        report("hand-written loop", seconds, len(documents), sum(map(len, results)))
+
+    seconds, results = timed(lambda: [schema.extract(html, BASE_URL) for html in documents])
+    report("schema, 1 process", seconds, len(documents), sum(map(len, results)))
+
+    pairs = [(html, BASE_URL) for html in documents]
+    seconds, results = timed(lambda: extract_many(name, pairs, workers=workers))
+    report(f"extract_many, {workers or os.cpu_count()} workers", seconds, len(documents), sum(map(len, results)))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == "--dir":
+        if len(args) < 3:
+            sys.exit("Usage: bench_extraction.py --dir PAGES_DIR SCHEMA_NAME [workers]")
+        documents = [html for _, html in load_pages(args[1])]
+        if not documents:
+            sys.exit("No *.html pages found.")
+        bench_schema(args[2], documents, int(args[3]) if len(args) > 3 else None)
+    else:
+        copies = int(args[0]) if args else 200
+        workers = int(args[1]) if len(args) > 1 else None
+        for name, html in load_pages(FIXTURES_DIR):
+            bench_schema(name, [html] * copies, workers)
@@ -0,0 +1,49 @@
+"""
+Compare per-page SERP extraction time: one execute_script call vs. the old
+per-element WebDriver round trips.
+
+Usage:
+    1. Start Chrome with --remote-debugging-port=9222 and open a Google results page.
+    2. python benchmarks/bench_serp_extract.py [rounds]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from company_search_google import (
+    REMOTE_DEBUGGING_PORT, SERP_SCHEMA, EXTRACT_RESULTS_JS, filter_serp_results, extract_urls_from_page_per_element
+)
+
+
+def extract_single_call(driver):
+    return filter_serp_results(SERP_SCHEMA.finish(driver.execute_script(EXTRACT_RESULTS_JS) or []))
+
+
+def bench(fn, driver, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = fn(driver)
+    return (time.perf_counter() - start) / rounds * 1000, results
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    chrome_options = Options()
+    chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{REMOTE_DEBUGGING_PORT}")
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    driver.switch_to.window(driver.window_handles[-1])
+    print(f"Page: {driver.current_url}")
+
+    before_ms, before = bench(extract_urls_from_page_per_element, driver, rounds)
+    after_ms, after = bench(extract_single_call, driver, rounds)
+    print(f"Per-element round trips: {before_ms:8.1f} ms/page ({len(before)} results)")
+    print(f"Single execute_script:   {after_ms:8.1f} ms/page ({len(after)} results)")
+    if before != after:
+        print("WARNING: the two extractors returned different results")
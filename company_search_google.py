@@ -6,22 +6,29 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 import time
-import random
 import csv
 from urllib.parse import quote
-import pandas as pd
 import traceback
 import requests
 from bs4 import BeautifulSoup
+from utils.block_detection import detect_block
+from utils.serp_store import SerpResultStore, SERP_DB
+from utils.serp_planner import plan_queries, attribute_hits
+from utils.pacing import AdaptivePacer, current_document, wait_for_any, wait_for_navigation
+from utils.extraction import get_schema
 # Change the search query to filter for recent, so you can actually just get a list of jobs that are being posted recently
 # ================= CONFIGURATION =================
 REMOTE_DEBUGGING_PORT = 9222
+# Longest wait for a results page (or a captcha) to render before extracting anyway
 WAIT_FOR_ELEMENT = 10
-PAGE_LOAD_DELAY = 3
+# Longest wait for a navigation to replace the previous page
+NAVIGATION_TIMEOUT = 20
+# Times a stuck navigation is re-issued before the rest of its query is skipped
+NAVIGATION_RETRIES = 2
+RESULT_SELECTORS = ["#rso", "#search", "#botstuff"]
+CAPTCHA_SELECTORS = ["form#captcha-form", "#recaptcha", "iframe[src*='recaptcha']"]
 
 # CONFIGURE YOUR SEARCH QUERY HERE
 locations = [
@@ -56,7 +63,7 @@ search_queries = [
     "inurl:/job"
 ]
 
-# Generate all combinations
+# Generate all combinations (one query per site; used when USE_PLANNER is off)
 all_queries = [
     f"{site} {location} {keyword_filter} {date_filter}"
     for site in search_queries
@@ -68,69 +75,92 @@ for q in all_queries[:10]:
     print(q)
 
 print(f"\nTotal queries generated: {len(all_queries)}")
-# Random delay between page clicks (in seconds)
-MIN_DELAY = 5
-MAX_DELAY = 20
-
-# Output file
+# Delay between page clicks (in seconds). It starts at INITIAL_DELAY and is
+# tuned by the pacer: doubled on a captcha, shortened while pages stay clean,
+# always within MIN_DELAY..MAX_DELAY
+INITIAL_DELAY = 12
+MIN_DELAY = 2
+MAX_DELAY = 300
+pacer = AdaptivePacer(initial_delay=INITIAL_DELAY, min_delay=MIN_DELAY, max_delay=MAX_DELAY)
+
+# Number of tabs working through all_queries in parallel. Each tab keeps its
+# own page delay; a captcha on any tab pauses all of them until it is solved.
+NUM_TABS = 3
+
+# Output files: results accumulate in SQLite (deduped by canonical URL across
+# runs); the CSV is exported once at the end for downstream scripts
+OUTPUT_DB = SERP_DB
 OUTPUT_CSV = "google_search_urls.csv"
 
-columns = ['query', 'url']
-results_df = pd.DataFrame(columns=columns)
+store = None  # SerpResultStore, opened in main()
+
+# Resume an interrupted sweep from its per-query/page checkpoints. Checkpoints
+# are cleared once every query completes; set to False to always start over.
+RESUME = True
+
+# Pack the site:/inurl: filters into OR-combined queries, sized by how many
+# results each filter returned in past runs (stored in OUTPUT_DB), instead of
+# running one query per site
+USE_PLANNER = True
 # ================= FUNCTIONS =================
 
-def extract_urls_from_page(driver):
-    """Extract all search result URLs and titles from current Google search page"""
-    results = []
-    
-    try:
-        # Find all search result blocks
-        blocks = driver.find_elements(By.XPATH, "//a[.//h3]")
-        if not blocks:
-            print("  No search result blocks found on page.")
-            return []
+# Collects every result link (an <a> wrapping an <h3>) in one WebDriver round
+# trip; the fields are defined by the google_serp schema in extraction_schemas.json
+SERP_SCHEMA = get_schema("google_serp")
+EXTRACT_RESULTS_JS = SERP_SCHEMA.to_js()
 
-        for block in blocks:
-            try:
-                # URL
-                href = block.get_attribute('href')
-                if not href or 'google.com' in href:
-                    continue
-                if any(x in href for x in ['/search?', 'google.com/url', 'support.google']):
-                    continue
 
-                # Title: text of the <h3> inside this <a>
-                try:
-                    title_el = block.find_element(By.TAG_NAME, 'h3')
-                    title = title_el.text.strip() if title_el else ""
-                    if not title:
-                        print("  Title element found but empty")
-                except:
-                    title = ""
-
-                results.append({
-                    "url": href,
-                    "title": title
-                })
-                print(f"  Found URL: {href} | Title: {title}")
-
-            except Exception as e:
-                print(f"  Skipping block due to error: {e}")
-                continue
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_results = []
-        for r in results:
-            if r['url'] not in seen:
-                seen.add(r['url'])
-                unique_results.append(r)
+def filter_serp_results(raw_results):
+    """Drop Google-internal links and duplicates, preserving order"""
+    seen = set()
+    unique_results = []
+    for r in raw_results:
+        href = r.get('url')
+        if not href or 'google.com' in href:
+            continue
+        if any(x in href for x in ['/search?', 'google.com/url', 'support.google']):
+            continue
+        if href in seen:
+            continue
+        seen.add(href)
+        unique_results.append({"url": href, "title": r.get('title') or ""})
+    return unique_results
 
-        return unique_results
 
+def extract_urls_from_page(driver):
+    """Extract all search result URLs and titles from current Google search page"""
+    start = time.perf_counter()
+    try:
+        raw_results = SERP_SCHEMA.finish(driver.execute_script(EXTRACT_RESULTS_JS) or [])
     except Exception as e:
         print(f"  Error extracting URLs: {e}")
         return []
 
+    if not raw_results:
+        print("  No search result blocks found on page.")
+        return []
+
+    results = filter_serp_results(raw_results)
+    print(f"  Extracted {len(results)} results from {len(raw_results)} blocks "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return results
+
+
+def extract_urls_from_page_per_element(driver):
+    """
+    Previous extractor: two or more WebDriver round trips per result block.
+    Kept only so benchmarks/bench_serp_extract.py can compare the two.
+    """
+    results = []
+    for block in driver.find_elements(By.XPATH, "//a[.//h3]"):
+        try:
+            href = block.get_attribute('href')
+            title = block.find_element(By.TAG_NAME, 'h3').text.strip()
+        except Exception:
+            continue
+        results.append({"url": href, "title": title})
+    return filter_serp_results(results)
+
 
 def click_next_page(driver):
     """Try to click the 'Next' button to go to next page"""
@@ -159,50 +189,44 @@ def click_next_page(driver):
         return False
 
 
-def save_dataframe_to_csv(df, filename):
-    """Save the global DataFrame to CSV"""
-    df.to_csv(filename, index=False, encoding='utf-8')
-    print(f"\n[INFO] Saved {len(df)} total URLs to {filename}")
+def get_next_page_url(driver):
+    """Return the href of the 'Next' link on the current results page, or None"""
+    try:
+        return driver.execute_script(
+            "var a = document.querySelector(\"a#pnnext, a[aria-label='Next page']\");"
+            "return a ? a.href : null;"
+        )
+    except Exception as e:
+        print(f"  Could not read next page URL: {e}")
+        return None
+
 
 def is_captcha_in_html(html):
-    """Return True if any known captcha markers exist in the provided html string."""
-    # exact markers you provided
-    markers = [
-        'id="recaptcha-anchor-label"',
-    ]
-    # some additional common signals to increase detection reliability
-    extra_signals = [
-        'g-recaptcha',        # common attribute for reCAPTCHA
-        'recaptcha',          # generic string
-        'class="grecaptcha"', # other naming
-        'data-sitekey'        # reCAPTCHA sitekey attribute
-    ]
-    for m in markers:
-        if m in html:
-            return True
-    for s in extra_signals:
-        if s in html:
-            return True
-    return False
+    """Return True if a captcha/block signature shows up in the head of the provided html string."""
+    match = detect_block(html, "https://www.google.com/")
+    if match:
+        print(f"  Block signature '{match.signature}' matched: {match.marker!r}")
+    return match is not None
 
 def check_for_captcha(driver, poll_interval=20, save_on_detect=True):
+    """Block until no captcha is on the current page. Returns True if one had to be solved."""
     try:
         html = driver.page_source or ""
     except Exception as e:
         print(f"[WARN] Could not get page source to check captcha: {e}")
         # Be conservative: treat as no captcha to avoid blocking unnecessarily
-        return
+        return False
 
     if not is_captcha_in_html(html):
         # No captcha immediately present
-        return
+        return False
 
     # Captcha detected — persist progress and wait for manual resolution
     print("\n[CAPTCHA DETECTED] reCAPTCHA or similar marker found on page.")
-    if save_on_detect:
+    if save_on_detect and store is not None:
         try:
-            # Save immediate progress to the main CSV
-            save_dataframe_to_csv(results_df, OUTPUT_CSV)
+            # Persist any batched results before waiting
+            store.flush()
         except Exception as e:
             print(f"[WARN] Failed to save progress on captcha detection: {e}")
 
@@ -222,87 +246,236 @@ def check_for_captcha(driver, poll_interval=20, save_on_detect=True):
             print("[CAPTCHA CLEARED] Captcha no longer detected. Resuming scraping.")
             # short pause to let page settle
             time.sleep(1)
-            return
+            return True
         else:
             print(f"[STILL BLOCKED] Captcha still present — will check again in {poll_interval}s.")
 
 
+class TabWorker:
+    """One browser tab working through a query, with its own pacing clock."""
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.query = None
+        self.clauses = ()
+        self.clause_hits = {}
+        self.resumed = False
+        self.page_count = 0
+        self.url_count = 0
+        self.next_ready = 0.0
+        self.old_document = None
+        self.target_url = None
+        self.retries = 0
+
+    def start_query(self, driver, search_query, clauses=(), checkpoint=None):
+        self.query = search_query
+        self.clauses = clauses
+        self.clause_hits = {clause: 0 for clause in clauses}
+        self.resumed = bool(checkpoint and checkpoint[1])
+        self.page_count = 0
+        self.url_count = 0
+        search_url = f"https://www.google.com/search?q={quote(search_query)}&lr=lang_en"
+        if checkpoint and checkpoint[1]:
+            # Pick up mid-query at the page after the last one completed
+            self.page_count, search_url = checkpoint[0], checkpoint[1]
+            print(f"\n[Tab {self.handle[-6:]}] Resuming query at page {self.page_count + 1}: {search_query}")
+        else:
+            print(f"\n[Tab {self.handle[-6:]}] Opening search for query: {search_query}")
+        self.retries = 0
+        self.navigate(driver, search_url)
+
+    def navigate(self, driver, url):
+        self.target_url = url
+        driver.switch_to.window(self.handle)
+        # Remember the page being left, so servicing the tab waits for the new one
+        self.old_document = current_document(driver)
+        # Navigate without blocking on the page load so the other tabs keep working
+        driver.execute_script("window.location.href = arguments[0];", url)
+        # Readiness is awaited when the tab is serviced, so it is due right away
+        self.next_ready = time.monotonic()
+
+
+def process_tab_page(driver, tab):
+    """
+    Extract the current page of a tab's query and move it to the next page.
+    Returns False once the query has no more pages.
+    """
+    tab.page_count += 1
+    print(f"\n[Tab {tab.handle[-6:]}] [Page {tab.page_count}] Extracting URLs for: {tab.query}")
+
+    page_results = extract_urls_from_page(driver)
+
+    if not page_results:
+        print("  No URLs found on this page. Stopping.")
+        store.checkpoint(tab.query, tab.page_count, None, completed=True)
+        return False
+
+    # Yield counts every result the query returned, so the planner knows how
+    # full a combined query gets, not just how many URLs were new
+    for clause, hits in attribute_hits(tab.clauses, page_results).items():
+        tab.clause_hits[clause] += hits
+
+    # Only URLs not seen in any query or past run are added
+    new_results = store.add(tab.query, page_results)
+    tab.url_count += len(new_results)
+    print(f"  Added {len(new_results)} new URLs (Query total: {tab.url_count}, all runs: {len(store)})")
+
+    next_url = get_next_page_url(driver)
+    store.checkpoint(tab.query, tab.page_count, next_url, completed=next_url is None)
+
+    tab.old_document = current_document(driver)
+    tab.target_url = next_url
+    tab.retries = 0
+    if not click_next_page(driver):
+        print("  Could not find 'Next' button. End of results.")
+        store.checkpoint(tab.query, tab.page_count, None, completed=True)
+        return False
+
+    delay = pacer.next_delay()
+    print(f"  Tab will continue in {delay:.1f} seconds...")
+    tab.next_ready = time.monotonic() + delay
+    return True
+
+
+def build_query_plan(resume):
+    """
+    Return the sweep's [(query, clauses)]. A resumed sweep reuses the plan it
+    was checkpointed under, so its query texts still match the checkpoints.
+    """
+    if resume:
+        planned = store.load_plan()
+        if planned:
+            print(f"\nResuming the stored plan of {len(planned)} queries.")
+            return planned
+
+    if USE_PLANNER:
+        planned = [(q.text, q.clauses) for q in
+                   plan_queries(search_queries, locations, keyword_filter, date_filter, store.load_site_yields())]
+        print(f"\nPlanned {len(planned)} queries for {len(search_queries) * len(locations)} site/location pairs:")
+        for query, _ in planned:
+            print(f"  {query}")
+    else:
+        planned = [(f"{site} {location} {keyword_filter} {date_filter}", (site,))
+                   for site in search_queries
+                   for location in locations]
+    store.save_plan(planned)
+    return planned
+
+
+def finish_query(tab):
+    print(f"\nCompleted query: {tab.query}, collected {tab.url_count} new URLs.")
+    store.flush()
+    # A query resumed mid-way only saw part of its results, which would understate its yield
+    if not tab.resumed:
+        store.record_site_yield(tab.clause_hits, tab.page_count)
+
+
+def start_next_query(driver, tab, tabs, pending_queries, checkpoints):
+    """Give the tab the next pending query, or retire it once none are left"""
+    if pending_queries:
+        query, clauses = pending_queries.pop(0)
+        tab.start_query(driver, query, clauses, checkpoints.get(query))
+    else:
+        tabs.remove(tab)
+
+
 def main():
-    global results_df  # use the global DataFrame
+    global store
     print("=" * 60)
     print("Google Search URL Scraper")
     print("=" * 60)
-    print(f"Delay between pages: {MIN_DELAY}-{MAX_DELAY} seconds")
+    print(f"Delay between pages: adaptive, starting at {INITIAL_DELAY}s ({MIN_DELAY}-{MAX_DELAY}s)")
+    print(f"Parallel tabs: {NUM_TABS}")
     print("=" * 60)
     
+    store = SerpResultStore(OUTPUT_DB)
     try:
         print("\nConnecting to existing Chrome session...")
         chrome_options = Options()
         chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{REMOTE_DEBUGGING_PORT}")
         driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-        wait = WebDriverWait(driver, WAIT_FOR_ELEMENT)
         print("Connected successfully!")
 
-        # Open a single new tab at the start
-        driver.execute_script("window.open('about:blank', '_blank');")
-        driver.switch_to.window(driver.window_handles[-1])
-
-        for search_query in all_queries:
-            page_count = 0
-            query_urls = []
-
-            search_url = f"https://www.google.com/search?q={quote(search_query)}&lr=lang_en"
-            print(f"\nOpening search in tab for query: {search_query}")
-
-            # Navigate to the search URL in the same tab
-            driver.get(search_url)
-            time.sleep(PAGE_LOAD_DELAY)
+        checkpoints = store.load_checkpoints() if RESUME else {}
+        if not RESUME:
+            store.reset_checkpoints()
+        planned = build_query_plan(RESUME)
+        pending_queries = [(q, clauses) for q, clauses in planned if not checkpoints.get(q, (0, None, False))[2]]
+        skipped = len(planned) - len(pending_queries)
+        if skipped:
+            print(f"\nSkipping {skipped} queries completed in a previous run.")
+
+        tabs = []
+        for _ in range(min(NUM_TABS, len(pending_queries))):
+            driver.execute_script("window.open('about:blank', '_blank');")
+            tab = TabWorker(driver.window_handles[-1])
+            query, clauses = pending_queries.pop(0)
+            tab.start_query(driver, query, clauses, checkpoints.get(query))
+            tabs.append(tab)
+        unfinished = 0
+
+        # WebDriver drives one tab at a time, but page loads and the waits
+        # between pages overlap: always service the tab whose delay ends first
+        while tabs:
+            tab = min(tabs, key=lambda t: t.next_ready)
+            wait_time = tab.next_ready - time.monotonic()
+            if wait_time > 0:
+                time.sleep(wait_time)
+            driver.switch_to.window(tab.handle)
+            # The previous page's results stay in the DOM until the navigation commits
+            if not wait_for_navigation(driver, tab.old_document, NAVIGATION_TIMEOUT):
+                # Extracting now would file the old page under this query
+                print(f"  [Tab {tab.handle[-6:]}] Still on the previous page after {NAVIGATION_TIMEOUT}s.")
+                if tab.target_url and tab.retries < NAVIGATION_RETRIES:
+                    tab.retries += 1
+                    print(f"  Re-issuing the navigation ({tab.retries}/{NAVIGATION_RETRIES}).")
+                    tab.navigate(driver, tab.target_url)
+                    tab.next_ready = time.monotonic() + pacer.next_delay()
+                    continue
+                # The query's checkpoint still points at this page, so a resumed sweep retries it
+                print(f"  Navigation never committed, skipping the rest of query: {tab.query}")
+                store.flush()
+                unfinished += 1
+                start_next_query(driver, tab, tabs, pending_queries, checkpoints)
+                continue
+            tab.old_document = None
+            # Extract as soon as the results (or a captcha) have rendered
+            if wait_for_any(driver, RESULT_SELECTORS + CAPTCHA_SELECTORS, WAIT_FOR_ELEMENT) is None:
+                print(f"  Page not ready after {WAIT_FOR_ELEMENT}s, extracting anyway.")
 
             # CHECK FOR CAPTCHA BEFORE EXTRACTING URLS
-            check_for_captcha(driver, poll_interval=20, save_on_detect=True)
-
-            while True:
-                page_count += 1
-                print(f"\n[Page {page_count}] Extracting URLs...")
-
-                page_results = extract_urls_from_page(driver)
-
-                if not page_results:
-                    print("  No URLs found on this page. Stopping.")
-                    break
-
-                # Filter out URLs that have already been seen
-                new_results = [r for r in page_results if r['url'] not in query_urls]
-                query_urls.extend([r['url'] for r in new_results])
-                print(f"  Added {len(new_results)} new URLs (Total: {len(query_urls)})")
-
-                # Add to global DataFrame
-                new_rows = pd.DataFrame({
-                    'query': [search_query]*len(new_results),
-                    'url': [r['url'] for r in new_results],
-                    'title': [r['title'] for r in new_results]
-                })
-                results_df = pd.concat([results_df, new_rows], ignore_index=True)
-
-                if not click_next_page(driver):
-                    print("  Could not find 'Next' button. End of results.")
-                    break
+            # This blocks the whole loop, so every tab pauses until it is solved
+            blocked = check_for_captcha(driver, poll_interval=20, save_on_detect=True)
+            pacer.record(blocked)
+            if blocked:
+                wait_for_any(driver, RESULT_SELECTORS, WAIT_FOR_ELEMENT)
+                # Resume together, but stagger the other tabs so they don't all fire at once
+                for i, other in enumerate(t for t in tabs if t is not tab):
+                    other.next_ready = time.monotonic() + pacer.next_delay() * (i + 1) / len(tabs)
+
+            if process_tab_page(driver, tab):
+                continue
 
-                delay = random.randint(MIN_DELAY, MAX_DELAY)
-                print(f"  Waiting {delay} seconds before next page...")
-                time.sleep(delay)
+            finish_query(tab)
+            start_next_query(driver, tab, tabs, pending_queries, checkpoints)
 
-            print(f"\nCompleted query: {search_query}, collected {len(query_urls)} URLs.")
-            save_dataframe_to_csv(results_df, OUTPUT_CSV)
+        stats = pacer.stats()
+        print(f"\nPacing: {stats['blocks']} captchas in {stats['pages']} pages, final delay {stats['delay']:.1f}s")
+        if unfinished:
+            print(f"\n{unfinished} queries were skipped unfinished. Keeping checkpoints so a resumed run finishes them.")
+        else:
+            # The sweep finished, so the next run starts over from the first query
+            print("\nAll queries completed. Clearing checkpoints.")
+            store.reset_checkpoints()
 
     except Exception as e:
         print("\n[ERROR] An exception occurred during scraping.")
         traceback.print_exc()
-        save_dataframe_to_csv(results_df, OUTPUT_CSV)
 
     finally:
         print("\nScript finished.")
-        save_dataframe_to_csv(results_df, OUTPUT_CSV)
+        store.export_csv(OUTPUT_CSV)
+        store.close()
         print("Browser tab will remain open for manual review.")
 
 
@@ -3,20 +3,27 @@ import random
 import json
 import time
 from os import getenv
-from typing import Optional, Dict, Any, Union
-from dataclasses import dataclass
+from typing import Optional, Dict, Any, Union, Iterable, AsyncIterable, AsyncIterator
+from dataclasses import dataclass, field
 from rnet import Impersonate, Client, Proxy, Response
 from selectolax.parser import HTMLParser
 from fake_useragent import UserAgent
 from playwright.async_api import async_playwright, Browser as PWBrowser
-from asynciolimiter import Limiter
 from rich import print
+from utils.rate_limit import HostScheduler
+from utils.strategy_cache import StrategyCache
+from utils.response_cache import ResponseCache, CachedResponse
+from utils.block_detection import detect_block
 
 @dataclass
 class ClientConfig:
     use_proxy: bool = False
     proxy_url: Optional[str] = None
-    rate_limit_rpm: int = 20
+    rate_limit_rpm: int = 20  # per host
+    burst: int = 1  # requests a host may take back to back after idling
+    per_host_concurrency: int = 4
+    # host -> {"rate_limit_rpm": ..., "burst": ..., "concurrency": ...}
+    host_limits: Dict[str, Dict[str, int]] = field(default_factory=dict)
     enable_ua_rotation: bool = True
     enable_delay_jitter: bool = True
     min_delay: float = 1.0
@@ -25,23 +32,69 @@ class ClientConfig:
     timeout: int = 30
     enable_tls_fingerprinting: bool = True
     enable_http2: bool = True
+    ua_buckets: int = 4  # distinct user agents to rotate through, one pooled client each
+    browser_pages: int = 4  # warm pages kept open for get_with_browser
+    # Playwright resource types aborted at the route level (empty = load everything)
+    blocked_resource_types: tuple = ("image", "font", "media")
+    # Per-domain HTTP/browser tier stats used by fetch() (None = keep in memory only)
+    strategy_file: Optional[str] = "fetch_strategy.json"
+    strategy_reprobe_every: int = 20
+    # On-disk response cache for get() (None = disabled)
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = 512 * 1024 * 1024
+    cache_default_ttl: float = 0  # seconds served without revalidating (0 = always revalidate)
+    cache_domain_ttls: Dict[str, float] = field(default_factory=dict)
+    close_drain_timeout: float = 10.0
+
+@dataclass
+class FetchResult:
+    """Outcome of one URL in fetch_many: errors come back as values, not exceptions."""
+    url: str
+    index: int
+    response: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
 
 class SuperClient:
-    def __init__(self):
-        self.config = ClientConfig()
-        self._last_request_time = 0
+    def __init__(self, config: Optional[ClientConfig] = None):
+        self.config = config or ClientConfig()
         self._request_count = 0
         self._playwright = None
         self._browser = None
         self._browser_context = None
+        self._page_pool: Optional[asyncio.Queue] = None
+        self._page_slots: Optional[asyncio.Semaphore] = None
         self.ua = UserAgent()
-        self.current_ua = self.ua.random
-        # Simple timestamp-based rate limiting (requests per minute)
-        if self.config.rate_limit_rpm and self.config.rate_limit_rpm > 0:
-            self._min_interval = 60.0 / float(self.config.rate_limit_rpm)
-        else:
-            self._min_interval = 0.0
-        self.limiter = None
+        # UA rotation picks among a fixed set of agents so each one can keep a
+        # long-lived client (connection pool, HTTP/2 session, TLS state)
+        self._ua_pool = [self.ua.random for _ in range(max(1, self.config.ua_buckets))]
+        self._ua_bucket = 0
+        self.current_ua = self._ua_pool[0]
+        self._clients: Dict[tuple, Client] = {}
+        self._in_flight = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        # Per-host token buckets and concurrency slots
+        self.scheduler = HostScheduler(
+            rate_limit_rpm=self.config.rate_limit_rpm,
+            burst=self.config.burst,
+            concurrency=self.config.per_host_concurrency,
+            overrides=self.config.host_limits,
+        )
+        self.strategy = StrategyCache(self.config.strategy_file, reprobe_every=self.config.strategy_reprobe_every)
+        self.cache = None
+        if self.config.cache_dir:
+            self.cache = ResponseCache(
+                self.config.cache_dir,
+                max_bytes=self.config.cache_max_bytes,
+                default_ttl=self.config.cache_default_ttl,
+                domain_ttls=self.config.cache_domain_ttls,
+            )
     
     def _get_proxies(self):
         proxy_url = self.config.proxy_url or getenv("PROXY")
@@ -66,6 +119,24 @@ class SuperClient:
             'Sec-Fetch-User': '?1',
         }
         return Client(impersonate=impersonate, proxies=proxies, headers=headers, timeout=self.config.timeout, http2=self.config.enable_http2)
+
+    def _client_key(self):
+        impersonate = "chrome120" if self.config.enable_tls_fingerprinting else None
+        proxy_url = (self.config.proxy_url or getenv("PROXY")) if self.config.use_proxy else None
+        return (impersonate, proxy_url, self._ua_bucket)
+
+    def _get_http_client(self):
+        """Return the pooled client for the current profile/proxy/UA, creating it once"""
+        key = self._client_key()
+        client = self._clients.get(key)
+        if client is None:
+            client = self._create_http_client()
+            self._clients[key] = client
+        return client
+
+    def _rotate_ua(self):
+        self._ua_bucket = random.randrange(len(self._ua_pool))
+        self.current_ua = self._ua_pool[self._ua_bucket]
     
     async def ensure_browser(self, headless=True):
         if self._browser is None:
@@ -83,97 +154,268 @@ class SuperClient:
                 java_script_enabled=True,
                 bypass_csp=True,
             )
+            # Registered once on the context so pooled pages don't re-add it per call
+            await self._browser_context.add_init_script("""
+                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+                window.chrome = { runtime: {} };
+            """)
+            if self.config.blocked_resource_types:
+                await self._browser_context.route("**/*", self._route_handler)
+            self._page_pool = asyncio.Queue()
+            # One slot per page in use; released on return *and* on discard, so
+            # a failed page always frees room for a waiter to open a new one
+            self._page_slots = asyncio.Semaphore(self.config.browser_pages)
             print(f"✅ Browser initialized")
 
+    async def _route_handler(self, route):
+        if route.request.resource_type in self.config.blocked_resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _acquire_page(self):
+        """Take a warm page from the pool, or open a new one; at most browser_pages are in use"""
+        await self._page_slots.acquire()
+        try:
+            if not self._page_pool.empty():
+                return self._page_pool.get_nowait()
+            return await self._browser_context.new_page()
+        except BaseException:
+            self._page_slots.release()
+            raise
+
+    async def _release_page(self, page, discard=False):
+        try:
+            # A page that errored may be mid-navigation or crashed; replace it rather than reuse it
+            if discard or page.is_closed():
+                if not page.is_closed():
+                    await page.close()
+            else:
+                self._page_pool.put_nowait(page)
+        finally:
+            self._page_slots.release()
+
     def _calculate_delay(self):
         if not self.config.enable_delay_jitter:
             return 0
         return random.uniform(self.config.min_delay, self.config.max_delay)
 
-    async def _handle_retry(self, attempt, url, error):
+    async def _handle_retry(self, attempt, url, error=None):
         if attempt >= self.config.max_retries:
             raise error or Exception(f"Max retries exceeded for {url}")
         backoff_time = (2 ** attempt) + random.uniform(0, 1)
         await asyncio.sleep(backoff_time)
     
     async def get(self, url, **kwargs):
-        return await self._get_with_http(url, **kwargs)
+        if self.cache is None:
+            return await self._get_with_http(url, **kwargs)
+
+        request_headers = kwargs.get('headers') or {}
+        entry = self.cache.lookup(url, request_headers)
+        if entry and self.cache.is_fresh(entry):
+            return self.cache.serve(entry)
+        if entry:
+            kwargs['headers'] = {**request_headers, **self.cache.conditional_headers(entry)}
 
-    async def get_with_browser(self, url, wait_until="networkidle", timeout=30000, **kwargs):
+        response = await self._get_with_http(url, **kwargs)
+        if entry and response.status_code == 304:
+            return self.cache.serve(entry, revalidated=True)
+
+        self.cache.record_miss()
+        if response.status_code != 200:
+            return response
+        # The body can only be read once, so hand back a response built from it
+        body = await response.bytes()
+        self.cache.store(url, request_headers, 200, response.headers, body)
+        return CachedResponse(url, 200, response.headers, body, from_cache=False)
+
+    def cache_stats(self):
+        """Hit/revalidation/miss counts, hit rate and bytes not re-downloaded"""
+        return self.cache.stats() if self.cache else None
+
+    async def fetch(self, url, wait_for_selector=None, headless=True, **kwargs):
+        """
+        Tiered fetch returning the page HTML: plain HTTP first, the browser if
+        HTTP is blocked. Which tier works is learned per domain and persisted,
+        so domains that always need the browser skip the doomed HTTP attempt
+        (the cheaper tier is still re-probed now and then).
+        """
+        tiers = self.strategy.plan(url)
+        last_error = None
+        for tier in tiers:
+            escalating = tier != tiers[-1]
+            try:
+                if tier == "http":
+                    # A single attempt when a fallback follows: retrying with
+                    # backoff only delays the browser fetch that will succeed
+                    response = await self.get(url, _retries=0 if escalating else None, **kwargs)
+                    content = await response.text()
+                    blocked = self._check_blocking_indicators(content, response.status_code, url)
+                    if blocked and escalating:
+                        raise Exception("Blocked")
+                else:
+                    await self.ensure_browser(headless=headless)
+                    content = await self.get_with_browser(url, wait_for_selector=wait_for_selector)
+                    blocked = False
+                self.strategy.record(url, tier, blocked)
+                return content
+            except Exception as e:
+                self.strategy.record(url, tier, True)
+                last_error = e
+                if escalating:
+                    print(f"[yellow]↪ {tier} tier failed for {url}, falling back[/yellow]")
+        raise last_error
+
+    async def fetch_many(self, urls: Union[Iterable[str], AsyncIterable[str]], concurrency: int = 10,
+                         ordered: bool = False, **kwargs) -> AsyncIterator[FetchResult]:
+        """
+        Fetch many URLs over HTTP with at most `concurrency` in flight, yielding
+        a FetchResult per URL as it completes (or in input order with
+        ordered=True). Per-host limits from the scheduler still apply, so a
+        large batch against one host is paced while other hosts run freely.
+        """
+        async def source():
+            if hasattr(urls, '__aiter__'):
+                async for url in urls:
+                    yield url
+            else:
+                for url in urls:
+                    yield url
+
+        async def run(index, url):
+            result = FetchResult(url=url, index=index)
+            start = time.monotonic()
+            try:
+                result.response = await self.get(url, _result=result, **kwargs)
+            except Exception as e:
+                result.error = e
+            result.elapsed = time.monotonic() - start
+            return result
+
+        url_iter = source().__aiter__()
+        pending = set()
+        buffered = {}  # ordered mode: finished results waiting on an earlier index
+        next_index = 0
+        submitted = 0
+        exhausted = False
+        try:
+            while True:
+                # In ordered mode buffered results count against the window so
+                # one slow URL can't make the buffer grow without bound
+                while not exhausted and len(pending) + len(buffered) < concurrency:
+                    try:
+                        url = await url_iter.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.create_task(run(submitted, url)))
+                    submitted += 1
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if ordered:
+                        buffered[result.index] = result
+                    else:
+                        yield result
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_with_browser(self, url, wait_until="networkidle", timeout=30000, wait_for_selector=None, **kwargs):
+        """
+        Load `url` in a pooled page and return its HTML. With `wait_for_selector`
+        the page is read as soon as that selector appears (after DOMContentLoaded)
+        instead of waiting for the network to go idle.
+        """
         if self._browser is None:
             raise RuntimeError("Browser not initialized. Call ensure_browser() first.")
+        if wait_for_selector:
+            wait_until = "domcontentloaded"
         
         for attempt in range(self.config.max_retries + 1):
+            page = None
             try:
                 await self._apply_delay()
-                page = await self._browser_context.new_page()
+                page = await self._acquire_page()
                 
-                # Add common browser automation protections
-                await page.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                    window.chrome = { runtime: {} };
-                """)
-                
-                response = await page.goto(
-                    url, 
-                    wait_until=wait_until, 
-                    timeout=timeout
-                )
+                async with self.scheduler.slot(url):
+                    response = await page.goto(
+                        url, 
+                        wait_until=wait_until, 
+                        timeout=timeout
+                    )
+                    if wait_for_selector:
+                        await page.wait_for_selector(wait_for_selector, timeout=timeout)
                 
                 if not response:
                     raise Exception("No response from browser")
                 
                 content = await page.content()
                 
-                if self._check_blocking_indicators(content, response.status):
+                if self._check_blocking_indicators(content, response.status, url):
                     if attempt < self.config.max_retries:
                         print(f"[yellow]🚨 Browser blocked, retrying...[/yellow]")
-                        await page.close()
+                        await self._release_page(page)
+                        page = None
                         await self._handle_retry(attempt, url)
                         continue
                     else:
                         raise Exception("Browser still blocked after retries")
                 
-                await page.close()
+                await self._release_page(page)
                 return content
                 
+            except asyncio.CancelledError:
+                if page is not None:
+                    await self._release_page(page, discard=True)
+                raise
             except Exception as e:
+                if page is not None:
+                    await self._release_page(page, discard=True)
                 if attempt < self.config.max_retries:
                     await self._handle_retry(attempt, url, e)
                 else:
                     print(f"[red]❌ Browser failed after {self.config.max_retries} retries: {e}[/red]")
                     raise
 
-    async def _get_with_http(self, url, **kwargs):
-        client = self._create_http_client()
-        for attempt in range(self.config.max_retries + 1):
+    async def _get_with_http(self, url, _result=None, _retries=None, **kwargs):
+        max_retries = self.config.max_retries if _retries is None else _retries
+        for attempt in range(max_retries + 1):
+            if _result is not None:
+                _result.attempts = attempt + 1
             try:
-                # Enforce per-minute rate limit using a minimal interval between requests
-                if getattr(self, "_min_interval", 0) > 0:
-                    now = time.monotonic()
-                    elapsed = now - (self._last_request_time or 0)
-                    if elapsed < self._min_interval:
-                        await asyncio.sleep(self._min_interval - elapsed)
-
                 await self._apply_delay()
-                response = await client.get(url, **kwargs)
-                self._last_request_time = time.monotonic()
+                client = self._get_http_client()
+                async with self.scheduler.slot(url):
+                    self._in_flight += 1
+                    self._drained.clear()
+                    try:
+                        response = await client.get(url, **kwargs)
+                    finally:
+                        self._in_flight -= 1
+                        if self._in_flight == 0:
+                            self._drained.set()
                 if self._is_blocked(response):
-                    if attempt < self.config.max_retries:
+                    if attempt < max_retries:
                         print(f"[yellow]🚨 Blocking detected, retrying...[/yellow]")
                         await self._handle_retry(attempt, url)
                         continue
                     else:
-                        raise Exception(f"Still blocked after {self.config.max_retries} retries")
+                        raise Exception(f"Still blocked after {max_retries} retries")
                 if self.config.enable_ua_rotation:
-                    self.current_ua = self.ua.random
+                    self._rotate_ua()
                 self._request_count += 1
                 return response
             except Exception as e:
-                if attempt < self.config.max_retries:
+                if attempt < max_retries:
                     await self._handle_retry(attempt, url, e)
                 else:
-                    print(f"[red]❌ Failed after {self.config.max_retries} retries: {e}[/red]")
+                    print(f"[red]❌ Failed after {max_retries} retries: {e}[/red]")
                     raise
     
     async def _apply_delay(self):
@@ -184,15 +426,33 @@ class SuperClient:
     def _is_blocked(self, response):
         return response.status_code in [403, 429, 503, 509]
     
-    def _check_blocking_indicators(self, text, status_code):
+    def _check_blocking_indicators(self, text, status_code, url=None):
         if status_code in [403, 429, 503, 509]:
             return True
-        text_lower = text.lower()
-        blocking_indicators = ["captcha", "challenge", "robot", "automated", "bot", "access denied", "blocked", "security check", "cloudflare", "distil", "datadome", "incapsula", "akamai", "perimeterx", "sorry we just need to make sure", "unusual traffic"]
-        return any(indicator in text_lower for indicator in blocking_indicators)
+        match = detect_block(text, url)
+        if match:
+            print(f"[yellow]🚨 Block signature '{match.signature}' matched: {match.marker!r}[/yellow]")
+        return match is not None
     
     async def close(self):
+        # Let in-flight requests finish before the pooled clients are released
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout=self.config.close_drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"[yellow]⚠️ Closing with {self._in_flight} requests still in flight[/yellow]")
+        self._clients.clear()
+        self.strategy.save()
+        if self.cache:
+            stats = self.cache.stats()
+            print(f"💾 Cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+                  f"{stats['misses']} misses ({stats['hit_rate']:.0%}), {stats['bytes_saved']} bytes saved")
+            self.cache.close()
+            self.cache = None
         if self._browser:
+            while self._page_pool is not None and not self._page_pool.empty():
+                await self._page_pool.get_nowait().close()
+            self._page_pool = None
+            self._page_slots = None
             await self._browser.close()
             if self._playwright:
                 await self._playwright.stop()
@@ -208,18 +468,12 @@ async def amazon_scraping_example():
         min_delay=1.0,  # Adjust these values as needed
         max_delay=3.0   # Adjust these values as needed
     )
-    client = SuperClient()
+    client = SuperClient(config)
     
     try:
-        try: # Option 1: Try with HTTP client first (faster)
-            response = await client.get("https://www.amazon.com/dp/B08N5WRWNW")
-            if client._is_blocked(response):
-                raise Exception("Blocked")
-            print(response.status_code)
-        except: # Option 2: Use browser if HTTP fails
-            await client.ensure_browser()
-            html_content = await client.get_with_browser("https://www.amazon.com/dp/B08N5WRWNW")
-            print(html_content.status_code)
+        # HTTP first, browser if blocked; the winning tier is remembered per domain
+        html_content = await client.fetch("https://www.amazon.com/dp/B08N5WRWNW")
+        print(len(html_content))
     finally:
         await client.close()
 
@@ -0,0 +1,193 @@
+"""
+Network-capture mode for the Upwork crawler: instead of rendering each page
+and parsing its HTML, attach to the Chrome debugging session and read the
+job objects out of the JSON (GraphQL/XHR) responses the page fetches.
+
+run this before using upwork_capture.py
+chrome.exe --remote-debugging-port=9222 --user-data-dir="C:\\ChromeDebug"
+"""
+import json
+import time
+import traceback
+from datetime import datetime
+from playwright.sync_api import sync_playwright
+from upwork_crawler import build_tasks
+from utils.block_detection import detect_block
+from utils.database import connect_to_db, create_db, upsert_jobs, export_jobs_csv
+from utils.job_helpers import job_from_listing
+from utils.pacing import AdaptivePacer
+from utils.upwork_payloads import find_job_objects, normalize_job
+
+# ================= CONFIGURATION =================
+REMOTE_DEBUGGING_URL = "http://127.0.0.1:9222"
+CSV_FILE = "upwork_jobs.csv"  # this run's new jobs, for upwork_job_parser.py
+JSONL_FILE = "upwork_jobs.jsonl"  # full captured job objects, one per line
+
+NUM_TABS = 3
+# Only JSON responses whose URL contains one of these are decoded
+CAPTURE_URL_MARKERS = ("/graphql", "/api/", "/search/jobs")
+# A page is done once jobs have arrived and no new job response came for this long
+SETTLE_TIME = 1.0
+PAGE_TIMEOUT = 20
+CAPTCHA_POLL_INTERVAL = 15
+
+pacer = AdaptivePacer(initial_delay=4, min_delay=1, max_delay=120)
+
+
+class CaptureTab:
+    """A Playwright page whose job-bearing responses are collected as they arrive."""
+
+    def __init__(self, page):
+        self.page = page
+        self.task = None
+        self.responses = []
+        self.jobs = []
+        self.started = 0.0
+        self.last_jobs_at = None
+        self.due = 0.0
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        # Only queue here; bodies are read from the main loop
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return
+        if not any(marker in response.url for marker in CAPTURE_URL_MARKERS):
+            return
+        if "json" not in (response.headers.get("content-type") or ""):
+            return
+        self.responses.append(response)
+
+    def navigate(self, task):
+        self.task = task
+        self.responses = []
+        self.jobs = []
+        self.last_jobs_at = None
+        self.started = time.monotonic()
+        # "commit" returns as soon as navigation starts, so all tabs load together
+        self.page.goto(task[2], wait_until="commit")
+
+    def drain(self):
+        """Decode queued responses and collect the job objects in them"""
+        responses, self.responses = self.responses, []
+        for response in responses:
+            try:
+                payload = response.json()
+            except Exception:
+                continue
+            found = [normalize_job(obj) for obj in find_job_objects(payload)]
+            if found:
+                self.jobs.extend(found)
+                self.last_jobs_at = time.monotonic()
+
+    def finished(self):
+        now = time.monotonic()
+        if self.last_jobs_at is not None and now - self.last_jobs_at >= SETTLE_TIME:
+            return True
+        return now - self.started >= PAGE_TIMEOUT
+
+
+def wait_until_unblocked(page, url):
+    print(f"[ACTION REQUIRED] Solve the challenge in the browser. Checking every {CAPTCHA_POLL_INTERVAL}s.")
+    while True:
+        page.wait_for_timeout(CAPTCHA_POLL_INTERVAL * 1000)
+        if not detect_block(page.content(), url):
+            print("[INFO] Challenge cleared. Resuming.")
+            return
+
+
+def write_jobs(tab, conn, cursor, jsonl_file, seen_ids):
+    """Upsert the tab's captured jobs in one transaction and append the full objects to the JSONL file"""
+    kind, label, url = tab.task
+    rows = []
+    for job in tab.jobs:
+        row = job_from_listing(job['title'], job['description'], job['url'] or url, job['posted_on'])
+        # The payload's own id beats one recovered from the URL
+        if job['job_id']:
+            row['job_id'] = job['job_id']
+        rows.append(row)
+        if row['job_id'] not in seen_ids:
+            seen_ids.add(row['job_id'])
+            jsonl_file.write(json.dumps({**job, 'query': label}, ensure_ascii=False) + "\n")
+    new_count = upsert_jobs(conn, cursor, rows, source=label)
+    print(f"[INFO] [{label}] {len(tab.jobs)} jobs captured, {new_count} new")
+    return new_count
+
+
+def main():
+    tasks = build_tasks()
+    print(f"[INFO] {len(tasks)} pages to capture across {NUM_TABS} tabs.")
+
+    playwright_instance = sync_playwright().start()
+    browser = playwright_instance.chromium.connect_over_cdp(REMOTE_DEBUGGING_URL)
+    context = browser.contexts[0]
+
+    # Jobs accumulate in upwork_jobs.db across runs (upserted on job_id)
+    run_started = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn, cursor = connect_to_db()
+    create_db(conn, cursor)
+
+    start = time.monotonic()
+    seen_ids = set()
+    new_total = 0
+    tabs = []
+    with open(JSONL_FILE, "a", encoding="utf-8") as jsonl_file:
+        try:
+            for _ in range(min(NUM_TABS, len(tasks))):
+                tab = CaptureTab(context.new_page())
+                tab.navigate(tasks.pop(0))
+                tabs.append(tab)
+
+            active = list(tabs)
+            while active:
+                # Waiting on any page lets Playwright deliver response events for all of them
+                active[0].page.wait_for_timeout(100)
+                now = time.monotonic()
+                for tab in list(active):
+                    if tab.task is None:
+                        if now < tab.due:
+                            continue
+                        if not tasks:
+                            active.remove(tab)
+                            continue
+                        tab.navigate(tasks.pop(0))
+                        continue
+
+                    tab.drain()
+                    if not tab.finished():
+                        continue
+
+                    if not tab.jobs:
+                        block = detect_block(tab.page.content(), tab.task[2])
+                        pacer.record(block is not None)
+                        if block:
+                            print(f"\n[BLOCKED] [{tab.task[1]}] Signature '{block.signature}' matched.")
+                            wait_until_unblocked(tab.page, tab.task[2])
+                            tab.navigate(tab.task)
+                            continue
+                        print(f"[WARN] [{tab.task[1]}] No job data captured after {PAGE_TIMEOUT}s.")
+                    else:
+                        pacer.record(False)
+
+                    new_total += write_jobs(tab, conn, cursor, jsonl_file, seen_ids)
+                    jsonl_file.flush()
+                    tab.task = None
+                    tab.due = time.monotonic() + pacer.next_delay()
+        except Exception:
+            print("\n[ERROR] An exception occurred during capture.")
+            traceback.print_exc()
+        finally:
+            for tab in tabs:
+                tab.page.close()
+            # Disconnects from the debugging session; the user's Chrome stays open
+            browser.close()
+            playwright_instance.stop()
+            exported = export_jobs_csv(cursor, CSV_FILE, run_started)
+            conn.close()
+
+    elapsed = time.monotonic() - start
+    print(f"\n[INFO] {new_total} new jobs saved to upwork_jobs.db ({len(seen_ids)} captured to {JSONL_FILE}) "
+          f"and {exported} exported to {CSV_FILE} in {elapsed:.0f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import time
+import traceback
+from datetime import datetime
+from urllib.parse import quote
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+import requests
+from utils.block_detection import detect_block
+from utils.database import connect_to_db, create_db, upsert_jobs, export_jobs_csv
+from utils.job_helpers import job_from_listing
+from utils.extraction import get_schema
+from utils.pacing import AdaptivePacer, current_document, wait_for_any, wait_for_navigation
+
+# ================= CONFIGURATION =================
+REMOTE_DEBUGGING_PORT = 9222
+CSV_FILE = "upwork_jobs.csv"  # this run's new jobs, for upwork_job_parser.py
+
+# (search query, number of result pages to read); each page holds PER_PAGE jobs
+QUERIES = [
+    ("rfp", 3),
+    ("proposal writing", 2),
+]
+PER_PAGE = 50
+INCLUDE_BEST_MATCHES = True  # also read the Best Matches feed (a single page)
+
+NUM_TABS = 3            # pages loading in parallel
+PAGE_READY_TIMEOUT = 20  # longest wait for the job list to render
+NAVIGATION_TIMEOUT = 20  # longest wait for a navigation to replace the previous page
+NAVIGATION_RETRIES = 2   # times a stuck navigation is re-issued before its page is skipped
+CAPTCHA_POLL_INTERVAL = 15
+
+SEARCH_URL = "https://www.upwork.com/nx/search/jobs/?nav_dir=pop&per_page={per_page}&q={query}&sort=recency&page={page}"
+BEST_MATCHES_URL = "https://www.upwork.com/nx/find-work/best-matches"
+
+# Extraction schema per page kind (see extraction_schemas.json). Each item
+# selector is scoped to its list container, so it doubles as the readiness check
+SCHEMAS = {
+    "search": get_schema("upwork_search"),
+    "best_matches": get_schema("upwork_best_matches"),
+}
+
+pacer = AdaptivePacer(initial_delay=4, min_delay=1, max_delay=120)
+
+
+# ================= FUNCTIONS =================
+
+def remote_debugging_available(port=REMOTE_DEBUGGING_PORT, timeout=1.0):
+    try:
+        resp = requests.get(f"http://127.0.0.1:{port}/json", timeout=timeout)
+        return resp.status_code == 200
+    except Exception:
+        return False
+
+
+def build_tasks():
+    """Expand QUERIES into one (kind, label, url) task per result page"""
+    tasks = []
+    if INCLUDE_BEST_MATCHES:
+        tasks.append(("best_matches", "best matches", BEST_MATCHES_URL))
+    for query, pages in QUERIES:
+        for page in range(1, pages + 1):
+            url = SEARCH_URL.format(per_page=PER_PAGE, query=quote(query), page=page)
+            tasks.append(("search", f"{query} p{page}", url))
+    return tasks
+
+
+def wait_until_unblocked(driver, url):
+    """Poll until the current tab no longer shows a block page"""
+    print(f"[ACTION REQUIRED] Solve the challenge in the browser. Checking every {CAPTCHA_POLL_INTERVAL}s.")
+    while True:
+        time.sleep(CAPTCHA_POLL_INTERVAL)
+        try:
+            html = driver.page_source or ""
+        except Exception as e:
+            print(f"[WARN] Could not read page while waiting for challenge: {e}")
+            continue
+        if not detect_block(html, url):
+            print("[INFO] Challenge cleared. Resuming.")
+            return
+
+
+class CrawlTab:
+    """A browser tab that alternates between loading a page and being read."""
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.task = None
+        self.loading = False
+        self.due = 0.0
+        self.old_document = None
+        self.retries = 0
+
+    def navigate(self, driver, task):
+        if task is not self.task:
+            self.retries = 0
+        self.task = task
+        self.loading = True
+        driver.switch_to.window(self.handle)
+        # The previous page's job list stays in the DOM until the navigation
+        # commits, so read_tab waits for this element to go stale first
+        self.old_document = current_document(driver)
+        # Navigate without blocking so the other tabs load at the same time
+        driver.execute_script("window.location.href = arguments[0];", task[2])
+        self.due = time.monotonic()
+
+
+def read_tab(driver, tab, conn, cursor):
+    """
+    Wait for the tab's job list, parse it and upsert its jobs in one transaction.
+    Returns the count of new jobs, or None if the tab is still on its previous page.
+    """
+    kind, label, url = tab.task
+    driver.switch_to.window(tab.handle)
+    if not wait_for_navigation(driver, tab.old_document, NAVIGATION_TIMEOUT):
+        print(f"[WARN] [{label}] Still on the previous page after {NAVIGATION_TIMEOUT}s.")
+        return None
+    tab.old_document = None
+    if wait_for_any(driver, [SCHEMAS[kind].items], PAGE_READY_TIMEOUT) is None:
+        print(f"[WARN] [{label}] No job list after {PAGE_READY_TIMEOUT}s.")
+
+    html = driver.page_source or ""
+    block = detect_block(html, url)
+    pacer.record(block is not None)
+    if block:
+        print(f"\n[BLOCKED] [{label}] Signature '{block.signature}' matched.")
+        wait_until_unblocked(driver, url)
+        wait_for_any(driver, [SCHEMAS[kind].items], PAGE_READY_TIMEOUT)
+        html = driver.page_source or ""
+
+    jobs = SCHEMAS[kind].extract(html, url)
+    new_count = upsert_jobs(conn, cursor, [job_from_listing(job['title'], job['description'], job['url'])
+                                           for job in jobs], source=label)
+    print(f"[INFO] [{label}] {len(jobs)} jobs, {new_count} new")
+    return new_count
+
+
+def main():
+    tasks = build_tasks()
+    print(f"[INFO] {len(tasks)} pages to read across {NUM_TABS} tabs.")
+
+    chrome_options = Options()
+    if remote_debugging_available():
+        chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{REMOTE_DEBUGGING_PORT}")
+        print(f"[INFO] Attached to existing Chrome at 127.0.0.1:{REMOTE_DEBUGGING_PORT}")
+    else:
+        print(f"[INFO] No remote-debugging Chrome detected. Launching new Chrome.")
+        chrome_options.add_argument("--start-maximized")
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+
+    # Jobs accumulate in upwork_jobs.db across runs (upserted on job_id)
+    run_started = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn, cursor = connect_to_db()
+    create_db(conn, cursor)
+
+    start = time.monotonic()
+    new_total = 0
+    try:
+        tabs = []
+        for _ in range(min(NUM_TABS, len(tasks))):
+            driver.execute_script("window.open('about:blank', '_blank');")
+            tab = CrawlTab(driver.window_handles[-1])
+            tab.navigate(driver, tasks.pop(0))
+            tabs.append(tab)
+
+        # Service whichever tab is due first: reading a loaded page, or
+        # starting the next navigation once the pacer's delay has passed
+        while tabs:
+            tab = min(tabs, key=lambda t: t.due)
+            wait_time = tab.due - time.monotonic()
+            if wait_time > 0:
+                time.sleep(wait_time)
+
+            if tab.loading:
+                new_count = read_tab(driver, tab, conn, cursor)
+                if new_count is not None:
+                    new_total += new_count
+                    tab.loading = False
+                elif tab.retries < NAVIGATION_RETRIES:
+                    tab.retries += 1
+                    print(f"[INFO] [{tab.task[1]}] Re-issuing the navigation ({tab.retries}/{NAVIGATION_RETRIES}).")
+                    tab.navigate(driver, tab.task)
+                else:
+                    print(f"[WARN] [{tab.task[1]}] Navigation never committed, skipping this page.")
+                    tab.loading = False
+                tab.due = time.monotonic() + pacer.next_delay()
+            elif tasks:
+                tab.navigate(driver, tasks.pop(0))
+            else:
+                tabs.remove(tab)
+    except Exception:
+        print("\n[ERROR] An exception occurred during crawling.")
+        traceback.print_exc()
+    finally:
+        exported = export_jobs_csv(cursor, CSV_FILE, run_started)
+        conn.close()
+
+    elapsed = time.monotonic() - start
+    stats = pacer.stats()
+    print(f"\n[INFO] {new_total} new jobs saved to upwork_jobs.db and {exported} exported to {CSV_FILE} "
+          f"in {elapsed:.0f}s ({stats['blocks']} blocks in {stats['pages']} pages).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,27 @@
-import time
-import csv
+from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 import requests
-from selectolax.parser import HTMLParser
+from utils.extraction import get_schema
+from utils.database import connect_to_db, create_db, upsert_jobs, export_jobs_csv
+from utils.job_helpers import job_from_listing
+from utils.block_detection import detect_block
+from utils.pacing import wait_for_any
 
 # ================= CONFIGURATION =================
 SEARCH_URL = "https://www.upwork.com/nx/search/jobs/?nav_dir=pop&per_page=50&q=rfp&sort=recency"
 REMOTE_DEBUGGING_PORT = 9222
-PAGE_LOAD_DELAY = 10
-CSV_FILE = "upwork_jobs.csv"
+PAGE_LOAD_DELAY = 10  # Longest wait for the job list to render
+SCHEMA = get_schema("upwork_search")  # selectors live in extraction_schemas.json
+CSV_FILE = "upwork_jobs.csv"  # this run's new jobs, for upwork_job_parser.py
+
+# ================= OPEN DATABASE =================
+# Jobs accumulate in upwork_jobs.db across runs (upserted on job_id)
+run_started = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+conn, cursor = connect_to_db()
+create_db(conn, cursor)
 
 # ================= ATTACH TO EXISTING CHROME =================
 chrome_options = Options()
@@ -35,38 +45,30 @@ else:
 # ================= OPEN NEW TAB AND FETCH HTML =================
 driver.execute_script(f"window.open('{SEARCH_URL}', '_blank');")
 driver.switch_to.window(driver.window_handles[-1])
-time.sleep(PAGE_LOAD_DELAY)  # Wait for page to load
+# Continue as soon as the first job card has rendered
+if wait_for_any(driver, [SCHEMA.items], PAGE_LOAD_DELAY) is None:
+    print(f"[WARN] No job cards after {PAGE_LOAD_DELAY}s.")
 
 html = driver.page_source
-doc = HTMLParser(html)
+block = detect_block(html, SEARCH_URL)
+if block:
+    print(f"[WARN] Page looks blocked ('{block.signature}'); solve it in the browser and re-run.")
 
 # ================= EXTRACT DATA =================
-job_cards = doc.css('section.card-list-container[data-test="JobsList"] article')
-
-print(f"[INFO] Found {len(job_cards)} job cards.")
-
-# Open CSV file for writing
-with open(CSV_FILE, "w", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow(["title", "description", "url"])  # Header row
-
-    for card in job_cards:
-        title_node = card.css_first('[data-test="job-tile-title-link UpLink"]')
-        desc_node = card.css_first('[data-test="UpCLineClamp JobDescription"]') 
-
-        if not title_node or not desc_node:
-            print("[WARN] Missing title or description node, skipping job card.")
-            continue
+jobs = SCHEMA.extract(html, SEARCH_URL)
 
-        title = title_node.text(strip=True)
-        description = desc_node.text(strip=True)
+print(f"[INFO] Found {len(jobs)} job cards.")
 
-        # Extract job URL from <a> tag inside title_node
-        a_tag = title_node.css_first("a")
-        url = a_tag.attributes.get("href") if a_tag else SEARCH_URL
+# ================= SAVE =================
+new_count = upsert_jobs(conn, cursor, [job_from_listing(job['title'], job['description'], job['url']) for job in jobs],
+                        source=SEARCH_URL)
+for job in jobs:
+    print(f"[INFO] Saved job: {job['title']}")
+print(f"[INFO] {new_count} of {len(jobs)} jobs are new.")
 
-        writer.writerow([title, description, url])
-        print(f"[INFO] Saved job: {title}")
+exported = export_jobs_csv(cursor, CSV_FILE, run_started)
+print(f"[INFO] Exported {exported} new jobs to {CSV_FILE}.")
 
 # ================= CLEANUP =================
+conn.close()
 driver.quit()
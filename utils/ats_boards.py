@@ -0,0 +1,145 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Pattern
+from urllib.parse import urlsplit, parse_qs
+
+
+@dataclass(frozen=True)
+class AtsAdapter:
+    """
+    One ATS with a public per-company job board API.
+
+    - slug_pattern: matched against host + path of a posting URL; group 1 is the company slug.
+    - board_url: API URL template with a {slug} placeholder; one GET returns the whole board.
+    - parse: turns the decoded API response into a list of normalised job records.
+    """
+    name: str
+    slug_pattern: Pattern
+    board_url: str
+    parse: Callable
+
+
+def _iso_date(value):
+    """ISO-8601 string or epoch milliseconds -> YYYY-MM-DD (or '' if missing)"""
+    if value in (None, ''):
+        return ''
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+def _record(ats, slug, title, locations, posted_on, job_id, url, description):
+    """
+    Build a job record in the shape the Workday crawler produces, so the same
+    writers (JobStreamWriter, save_jobs_to_file) can handle every source.
+    """
+    return {
+        'title': title or '',
+        'locationsText': ", ".join(loc for loc in locations if loc),
+        'postedOn': posted_on,
+        'bulletFields': [str(job_id)],
+        'externalPath': url or '',
+        'jobPostingInfo': {'jobDescription': description or ''},
+        'source': ats,
+        'company': slug,
+    }
+
+
+def parse_greenhouse(slug, data):
+    jobs = []
+    for job in data.get('jobs', []):
+        locations = [(job.get('location') or {}).get('name')]
+        locations += [office.get('name') for office in job.get('offices', [])
+                      if office.get('name') and office.get('name') not in locations]
+        posted = job.get('first_published') or job.get('updated_at')
+        jobs.append(_record('greenhouse', slug, job.get('title'), locations, _iso_date(posted),
+                            job.get('id'), job.get('absolute_url'), job.get('content')))
+    return jobs
+
+
+def parse_lever(slug, data):
+    jobs = []
+    for job in data if isinstance(data, list) else []:
+        categories = job.get('categories') or {}
+        locations = categories.get('allLocations') or [categories.get('location')]
+        jobs.append(_record('lever', slug, job.get('text'), locations, _iso_date(job.get('createdAt')),
+                            job.get('id'), job.get('hostedUrl'), job.get('descriptionPlain') or job.get('description')))
+    return jobs
+
+
+def parse_ashby(slug, data):
+    jobs = []
+    for job in data.get('jobs', []):
+        if job.get('isListed') is False:
+            continue
+        locations = [job.get('location')] + [loc.get('location') for loc in job.get('secondaryLocations', [])]
+        jobs.append(_record('ashby', slug, job.get('title'), locations, _iso_date(job.get('publishedAt')),
+                            job.get('id'), job.get('jobUrl'), job.get('descriptionHtml') or job.get('descriptionPlain')))
+    return jobs
+
+
+ADAPTERS = (
+    AtsAdapter(
+        "greenhouse",
+        re.compile(r"^(?:boards|job-boards)(?:\.eu)?\.greenhouse\.io/(?!embed/)([\w-]+)", re.I),
+        "https://boards-api.greenhouse.io/v1/boards/{slug}/jobs?content=true",
+        parse_greenhouse,
+    ),
+    AtsAdapter(
+        "lever",
+        re.compile(r"^jobs\.lever\.co/([\w.-]+)", re.I),
+        "https://api.lever.co/v0/postings/{slug}?mode=json",
+        parse_lever,
+    ),
+    AtsAdapter(
+        "lever_eu",
+        re.compile(r"^jobs\.eu\.lever\.co/([\w.-]+)", re.I),
+        "https://api.eu.lever.co/v0/postings/{slug}?mode=json",
+        parse_lever,
+    ),
+    AtsAdapter(
+        "ashby",
+        re.compile(r"^jobs\.ashbyhq\.com/([^/?#]+)", re.I),
+        "https://api.ashbyhq.com/posting-api/job-board/{slug}?includeCompensation=true",
+        parse_ashby,
+    ),
+)
+
+ADAPTERS_BY_NAME = {adapter.name: adapter for adapter in ADAPTERS}
+
+
+def board_from_url(url):
+    """
+    Identify the ATS board a posting URL belongs to.
+
+    Parameters:
+    - url (str): A posting or board URL, e.g. from the SERP results.
+
+    Returns:
+    - tuple or None: (adapter name, company slug), or None for other sites.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[len('www.'):]
+    # Embedded Greenhouse boards carry the slug in ?for=
+    if host.endswith('greenhouse.io') and parts.path.startswith('/embed/'):
+        slug = parse_qs(parts.query).get('for', [None])[0]
+        return ('greenhouse', slug) if slug else None
+    target = host + parts.path
+    for adapter in ADAPTERS:
+        match = adapter.slug_pattern.match(target)
+        if match:
+            return adapter.name, match.group(1)
+    return None
+
+
+def boards_from_urls(urls):
+    """Return the distinct (adapter name, slug) boards behind a list of URLs, in first-seen order"""
+    boards = {}
+    for url in urls:
+        board = board_from_url(url) if url else None
+        if board:
+            boards.setdefault(board, None)
+    return list(boards)
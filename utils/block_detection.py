@@ -0,0 +1,154 @@
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+# Block and captcha pages put their tell-tales in the <title>, the <head>
+# scripts, or the first screen of the body. Scanning only this much of a
+# multi-megabyte page keeps detection cheap and avoids matching words like
+# "bot" deep inside ordinary content.
+DEFAULT_SCAN_BUDGET = 32 * 1024
+
+TITLE_RE = re.compile(r"<title[^>]*>([^<]*)")
+
+
+@dataclass(frozen=True)
+class Signature:
+    """
+    Structural markers of a block page, all lower case.
+
+    - markers: literals matched anywhere in the scanned window (element ids,
+      classes, script paths, form actions).
+    - title_markers: literals matched only inside <title>, where generic
+      phrases like "access denied" are safe to look for.
+    - sites: host suffixes the signature applies to (empty = every site).
+    """
+    name: str
+    markers: Tuple[str, ...] = ()
+    title_markers: Tuple[str, ...] = ()
+    sites: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class BlockMatch:
+    signature: str
+    marker: str
+    offset: int
+
+
+SIGNATURES = (
+    # Generic captcha widgets
+    # Only challenge markup: ordinary pages load reCAPTCHA v3 (the grecaptcha
+    # global, the grecaptcha-badge and a g-recaptcha-response field) without blocking
+    Signature("recaptcha_widget", markers=('id="recaptcha-anchor-label"', 'class="g-recaptcha"',
+                                           'class="g-recaptcha ')),
+    Signature("hcaptcha_widget", markers=('h-captcha', 'hcaptcha.com/1/api.js')),
+    # Bot-protection vendors
+    Signature("cloudflare_challenge", markers=('/cdn-cgi/challenge-platform/', 'cf-chl-'),
+              title_markers=('just a moment',)),
+    Signature("cloudflare_block", title_markers=('attention required! | cloudflare',)),
+    Signature("datadome", markers=('captcha-delivery.com',)),
+    Signature("perimeterx", markers=('id="px-captcha"', 'captcha.px-cdn.net', '_pxcaptcha')),
+    Signature("incapsula", markers=('_incapsula_resource', 'incapsula incident id')),
+    Signature("distil", markers=('distil_r_captcha', 'distil_ident_block')),
+    Signature("access_denied", title_markers=('access denied',)),
+    # Site specific
+    Signature("google_sorry", markers=('action="/sorry/index"', 'id="captcha-form"',
+                                       'our systems have detected unusual traffic'),
+              sites=("google.com",)),
+    Signature("amazon_captcha", markers=('/errors/validatecaptcha', "sorry, we just need to make sure you're not a robot"),
+              sites=("amazon.com",)),
+)
+
+
+def _trie_pattern(literals):
+    """
+    Build a regex alternation shaped like a prefix trie, so the engine
+    branches on one character at a time instead of retrying every literal
+    at every position.
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ''
+        body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class BlockDetector:
+    """
+    Matches all applicable signatures in a single pass over the head of a
+    document and reports which one fired.
+
+    Parameters:
+    - signatures (tuple): Signature definitions to compile.
+    - scan_budget (int): Characters from the start of the document to scan.
+    """
+
+    def __init__(self, signatures=SIGNATURES, scan_budget=DEFAULT_SCAN_BUDGET):
+        self.signatures = signatures
+        self.scan_budget = scan_budget
+        self._compiled = {}
+
+    def _sites_for(self, host):
+        return tuple(sorted({site for sig in self.signatures for site in sig.sites
+                             if host == site or host.endswith("." + site)}))
+
+    def _compile(self, sites):
+        # One matcher per site set, built on first use and reused for every document
+        if sites not in self._compiled:
+            applicable = [sig for sig in self.signatures if not sig.sites or set(sig.sites) & set(sites)]
+            markers = {}
+            title_markers = {}
+            for sig in applicable:
+                for marker in sig.markers:
+                    markers.setdefault(marker, sig.name)
+                for marker in sig.title_markers:
+                    title_markers.setdefault(marker, sig.name)
+            pattern = re.compile(_trie_pattern(markers)) if markers else None
+            self._compiled[sites] = (pattern, markers, title_markers)
+        return self._compiled[sites]
+
+    def detect(self, html, url=None) -> Optional[BlockMatch]:
+        if not html:
+            return None
+        host = urlsplit(url).netloc.lower() if url else ""
+        pattern, markers, title_markers = self._compile(self._sites_for(host) if host else ())
+        window = html[:self.scan_budget].lower()
+
+        title = TITLE_RE.search(window)
+        if title:
+            for marker, name in title_markers.items():
+                if marker in title.group(1):
+                    return BlockMatch(signature=name, marker=marker, offset=title.start(1))
+
+        match = pattern.search(window) if pattern else None
+        if match is None:
+            return None
+        return BlockMatch(signature=markers[match.group(0)], marker=match.group(0), offset=match.start())
+
+
+_default_detector = BlockDetector()
+
+
+def detect_block(html, url=None):
+    """
+    Check a document for block/captcha markers with the shared detector.
+
+    Parameters:
+    - html (str): The document (only its first DEFAULT_SCAN_BUDGET characters are scanned).
+    - url (str): Where it came from, used to enable site-specific signatures.
+
+    Returns:
+    - BlockMatch or None: The signature that fired, if any.
+    """
+    return _default_detector.detect(html, url)
@@ -1,5 +1,7 @@
+import csv
 import os
 import sqlite3
+from datetime import datetime
 
 
 def connect_to_db(database_name='upwork_jobs.db'):
@@ -9,6 +11,8 @@ def connect_to_db(database_name='upwork_jobs.db'):
     database_path = os.path.join(parent_dir, database_name)
     # Connect to database
     conn = sqlite3.connect(database_path)
+    # WAL lets readers (e.g. the GPT parsing stage) query while a scraper writes
+    conn.execute('PRAGMA journal_mode=WAL')
     cursor = conn.cursor()
     return conn, cursor
 
@@ -25,8 +29,87 @@ def create_db(conn, cursor):
             job_description TEXT NOT NULL,
             job_tags TEXT,
             job_proposals TEXT,
-            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            updated_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            first_seen DATETIME,
+            last_seen DATETIME,
+            source TEXT
         )
     ''')
+    # Tables created before first_seen/last_seen/source existed get the columns added
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(jobs)')}
+    for column, column_type in (('first_seen', 'DATETIME'), ('last_seen', 'DATETIME'), ('source', 'TEXT')):
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE jobs ADD COLUMN {column} {column_type}')
+    # All timestamps are local time (datetime.now()), but rows from before the
+    # migration got updated_at from the old CURRENT_TIMESTAMP default, which is UTC
+    cursor.execute("UPDATE jobs SET updated_at = datetime(updated_at, 'localtime'), "
+                   "first_seen = datetime(updated_at, 'localtime'), last_seen = datetime(updated_at, 'localtime') "
+                   "WHERE first_seen IS NULL")
+    # The upsert is keyed on job_id, so keep only the oldest row of any duplicates before indexing
+    cursor.execute('DELETE FROM jobs WHERE id NOT IN (SELECT MIN(id) FROM jobs GROUP BY job_id)')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_job_id ON jobs (job_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_first_seen ON jobs (first_seen)')
     conn.commit()
 
+
+def upsert_jobs(conn, cursor, jobs, source=None):
+    """
+    Insert new jobs and refresh known ones in a single transaction.
+
+    Parameters:
+    - jobs (list): Dicts with job_id, job_title and job_description, plus
+      optional job_url, posted_date, job_tags and job_proposals.
+    - source (str): Where the jobs were scraped from (query, feed name, ...).
+
+    Returns:
+    - int: Number of jobs that were not in the table before.
+    """
+    if not jobs:
+        return 0
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = [(job['job_id'], job.get('job_url'), job['job_title'], job.get('posted_date'),
+             job['job_description'], job.get('job_tags'), job.get('job_proposals'), now, now, now, source)
+            for job in jobs]
+    ids = list({row[0] for row in rows})
+    with conn:
+        placeholders = ','.join('?' * len(ids))
+        known = {row[0] for row in cursor.execute(f'SELECT job_id FROM jobs WHERE job_id IN ({placeholders})', ids)}
+        # first_seen is only set on insert; everything else follows the latest scrape
+        cursor.executemany('''
+            INSERT INTO jobs (job_id, job_url, job_title, posted_date, job_description, job_tags, job_proposals,
+                              updated_at, first_seen, last_seen, source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(job_id) DO UPDATE SET
+                job_url = COALESCE(excluded.job_url, job_url),
+                job_title = excluded.job_title,
+                posted_date = COALESCE(excluded.posted_date, posted_date),
+                job_description = excluded.job_description,
+                job_tags = COALESCE(excluded.job_tags, job_tags),
+                job_proposals = COALESCE(excluded.job_proposals, job_proposals),
+                updated_at = excluded.updated_at,
+                last_seen = excluded.last_seen
+        ''', rows)
+    return len(set(ids) - known)
+
+
+def fetch_jobs_since(cursor, since):
+    """Return (job_title, job_description, job_url) for jobs first seen at or after `since` ("YYYY-MM-DD HH:MM:SS")"""
+    return cursor.execute(
+        'SELECT job_title, job_description, job_url FROM jobs WHERE first_seen >= ? ORDER BY first_seen, id', (since,)
+    ).fetchall()
+
+
+def export_jobs_csv(cursor, filename, since):
+    """
+    Write the jobs first seen at or after `since` to a CSV with the
+    title, description, url columns upwork_job_parser reads.
+
+    Returns:
+    - int: Number of jobs written.
+    """
+    rows = fetch_jobs_since(cursor, since)
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["title", "description", "url"])
+        writer.writerows(rows)
+    return len(rows)
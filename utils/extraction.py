@@ -0,0 +1,203 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from urllib.parse import urljoin
+
+from selectolax.parser import HTMLParser
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extraction_schemas.json')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Post-processing steps a field can list under "post", applied in order
+POST_PROCESSORS = {
+    'strip': lambda value, base_url: value.strip(),
+    'collapse_whitespace': lambda value, base_url: _WHITESPACE_RE.sub(' ', value).strip(),
+    'lower': lambda value, base_url: value.lower(),
+    'absolute_url': lambda value, base_url: urljoin(base_url, value) if base_url else value,
+}
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    How to read one field from an item element.
+
+    - selectors: CSS selectors tried in order inside the item (empty = the item itself).
+    - attr: attribute to read; None reads the element's text.
+    - post: names of POST_PROCESSORS steps.
+    - required: drop the item when the field is missing.
+    - fallback: "base_url" to use the document URL when the field is missing.
+    """
+    name: str
+    selectors: Tuple[str, ...] = ()
+    attr: Optional[str] = None
+    post: Tuple[str, ...] = ()
+    required: bool = False
+    fallback: Optional[str] = None
+
+
+class Schema:
+    """
+    A compiled per-site extraction schema: an item selector plus field specs.
+
+    Compiling resolves post-processing names to functions once, so the same
+    Schema can be run over any number of documents, either on HTML with
+    selectolax (extract) or inside the browser in one script call (to_js).
+    """
+
+    def __init__(self, name, items, fields):
+        self.name = name
+        self.items = items
+        self.fields = fields
+        self._compiled = tuple(
+            (field.name, field.selectors, field.attr, tuple(POST_PROCESSORS[step] for step in field.post),
+             field.required, field.fallback == 'base_url')
+            for field in fields
+        )
+
+    @classmethod
+    def from_config(cls, name, config):
+        fields = []
+        for field_name, spec in config['fields'].items():
+            selectors = spec.get('selector') or ()
+            if isinstance(selectors, str):
+                selectors = (selectors,)
+            unknown = [step for step in spec.get('post', ()) if step not in POST_PROCESSORS]
+            if unknown:
+                raise ValueError(f"Schema '{name}' field '{field_name}': unknown post step(s) {unknown}")
+            fields.append(FieldSpec(field_name, tuple(selectors), spec.get('attr'), tuple(spec.get('post', ())),
+                                    spec.get('required', False), spec.get('fallback')))
+        return cls(name, config['items'], tuple(fields))
+
+    @staticmethod
+    def _raw_value(item, selectors, attr):
+        node = item
+        if selectors:
+            node = None
+            for selector in selectors:
+                node = item.css_first(selector)
+                if node is not None:
+                    break
+            if node is None:
+                return None
+        if attr:
+            return node.attributes.get(attr)
+        return node.text(strip=True)
+
+    def _finish_one(self, get_raw, base_url):
+        record = {}
+        for name, selectors, attr, steps, required, base_url_fallback in self._compiled:
+            value = get_raw(name, selectors, attr)
+            if value is None and base_url_fallback:
+                value = base_url
+            if value is None:
+                if required:
+                    return None
+                record[name] = None
+                continue
+            for step in steps:
+                value = step(value, base_url)
+            record[name] = value
+        return record
+
+    def finish(self, raw_items, base_url=None):
+        """Apply fallbacks, post-processing and required checks to raw {field: value} items"""
+        records = (self._finish_one(lambda name, selectors, attr: raw.get(name), base_url) for raw in raw_items)
+        return [record for record in records if record is not None]
+
+    def extract(self, html, base_url=None):
+        """
+        Run the schema over one HTML document.
+
+        Parameters:
+        - html (str): The document.
+        - base_url (str): Where it came from; used by absolute_url and the base_url fallback.
+
+        Returns:
+        - list of dict: One record per item that has all required fields.
+        """
+        records = []
+        for item in HTMLParser(html).css(self.items):
+            record = self._finish_one(
+                lambda name, selectors, attr: self._raw_value(item, selectors, attr), base_url
+            )
+            if record is not None:
+                records.append(record)
+        return records
+
+    def to_js(self):
+        """
+        Compile the schema to a script for driver.execute_script that returns
+        the raw items. Pass the result to finish() for post-processing.
+        """
+        spec = [{'name': field.name, 'selectors': list(field.selectors), 'attr': field.attr}
+                for field in self.fields]
+        return f"""
+var spec = {json.dumps(spec)};
+return Array.from(document.querySelectorAll({json.dumps(self.items)})).map(function (item) {{
+    var raw = {{}};
+    spec.forEach(function (field) {{
+        var node = field.selectors.length ? null : item;
+        for (var i = 0; i < field.selectors.length && !node; i++) {{
+            node = item.querySelector(field.selectors[i]);
+        }}
+        if (!node) {{ raw[field.name] = null; return; }}
+        if (!field.attr) {{ raw[field.name] = (node.innerText || '').trim(); return; }}
+        // Resolved href/src properties give absolute URLs, like absolute_url does
+        var value = (field.attr in node && typeof node[field.attr] === 'string') ? node[field.attr] : node.getAttribute(field.attr);
+        raw[field.name] = value;
+    }});
+    return raw;
+}});
+"""
+
+
+def load_schemas(filename=SCHEMA_FILE):
+    """Compile every schema in the config file into {name: Schema}"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return {name: Schema.from_config(name, site) for name, site in config.items()}
+
+
+_schemas = {}
+
+
+def get_schema(name, filename=SCHEMA_FILE):
+    """Return a compiled schema, compiling the config file on first use"""
+    if filename not in _schemas:
+        _schemas[filename] = load_schemas(filename)
+    return _schemas[filename][name]
+
+
+def _init_worker(filename):
+    # Compile once per worker process, not once per document
+    _schemas[filename] = load_schemas(filename)
+
+
+def _extract_one(args):
+    name, filename, html, base_url = args
+    return get_schema(name, filename).extract(html, base_url)
+
+
+def extract_many(name, documents, workers=None, chunksize=8, filename=SCHEMA_FILE):
+    """
+    Run one schema over many documents across a process pool.
+
+    Parameters:
+    - name (str): Schema name in the config file.
+    - documents (iterable): HTML strings or (html, base_url) pairs.
+    - workers (int): Processes to use (None = os.cpu_count(); 1 = parse in this process).
+    - chunksize (int): Documents handed to a worker at a time.
+
+    Returns:
+    - list: One list of records per document, in input order.
+    """
+    jobs = [(name, filename, *(doc if isinstance(doc, tuple) else (doc, None))) for doc in documents]
+    if workers == 1:
+        return [_extract_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(filename,)) as pool:
+        return list(pool.map(_extract_one, jobs, chunksize=chunksize))
@@ -20,6 +20,23 @@ def generate_job_id(job_title):
     return hashlib.md5(job_title_bytes).hexdigest()
 
 
+def upwork_job_id(job_url, job_title=''):
+    """
+    Get the stable Upwork identifier of a job.
+
+    Parameters:
+    - job_url (str): The job URL, e.g. https://www.upwork.com/jobs/~01abc.../?referrer=...
+    - job_title (str): Used only when the URL carries no ciphertext.
+
+    Returns:
+    - str: The "~01..." ciphertext from the URL, or the title hash from generate_job_id.
+    """
+    match = re.search(r'(~0[0-9a-zA-Z]+)', job_url or '')
+    if match:
+        return match.group(1)
+    return generate_job_id(job_title)
+
+
 def calculate_posted_datetime(timestamp):
     """
     Calculate the datetime when a job was posted based on the given timestamp.
@@ -95,3 +112,23 @@ def parse_job_details(r):
         'job_tags': json.dumps(clean_skills(r[6:-6])),
         'job_id': generate_job_id(r[1])
     }
+
+
+def job_from_listing(title, description, url, posted_date=None):
+    """
+    Build a row for database.upsert_jobs from a scraped job listing.
+
+    Parameters:
+    - title (str), description (str), url (str): As scraped from the tile.
+    - posted_date (str): Optional publish time, when the source provides one.
+
+    Returns:
+    - dict: A job keyed by its Upwork job_id.
+    """
+    return {
+        'job_id': upwork_job_id(url, title),
+        'job_url': url,
+        'job_title': title,
+        'job_description': description,
+        'posted_date': posted_date,
+    }
@@ -0,0 +1,144 @@
+import random
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+
+class AdaptivePacer:
+    """
+    Inter-page delay controller driven by the observed block rate.
+
+    A blocked page (captcha, block page) multiplies the delay by `backoff`
+    and raises a floor just above the delay that got blocked. Every
+    `clean_streak` clean pages in a row, the delay shrinks by `shrink`,
+    and the floor slowly decays, so delays settle just above what the site
+    tolerates instead of a fixed worst-case guess.
+
+    Parameters:
+    - initial_delay (float): Starting delay in seconds.
+    - min_delay (float), max_delay (float): Hard bounds on the delay.
+    - backoff (float): Multiplier applied on a block.
+    - shrink (float): Multiplier (< 1) applied after a clean streak.
+    - clean_streak (int): Clean pages in a row before the delay shrinks.
+    - floor_margin (float): The floor is set to blocked delay * this margin.
+    - floor_decay (float): Multiplier applied to the floor after each clean streak.
+    - jitter (float): +/- fraction of random jitter on each returned delay.
+    """
+
+    def __init__(self, initial_delay=10.0, min_delay=2.0, max_delay=300.0, backoff=2.0, shrink=0.85,
+                 clean_streak=3, floor_margin=1.25, floor_decay=0.97, jitter=0.25):
+        self.delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.shrink = shrink
+        self.clean_streak = clean_streak
+        self.floor_margin = floor_margin
+        self.floor_decay = floor_decay
+        self.jitter = jitter
+        self.floor = min_delay
+        self.streak = 0
+        self.pages = 0
+        self.blocks = 0
+
+    def record(self, blocked):
+        """Feed back the outcome of one page and adjust the delay"""
+        self.pages += 1
+        if blocked:
+            self.blocks += 1
+            self.streak = 0
+            self.floor = min(self.max_delay, max(self.floor, self.delay * self.floor_margin))
+            self.delay = min(self.max_delay, max(self.floor, self.delay * self.backoff))
+            print(f"[PACING] Blocked: delay raised to {self.delay:.1f}s (floor {self.floor:.1f}s)")
+            return
+        self.streak += 1
+        if self.streak >= self.clean_streak:
+            self.streak = 0
+            self.floor = max(self.min_delay, self.floor * self.floor_decay)
+            self.delay = max(self.floor, self.delay * self.shrink)
+
+    def next_delay(self):
+        """The delay to wait before the next page, with jitter"""
+        spread = self.delay * self.jitter
+        return min(self.max_delay, max(self.min_delay, self.delay + random.uniform(-spread, spread)))
+
+    def sleep(self):
+        delay = self.next_delay()
+        time.sleep(delay)
+        return delay
+
+    @property
+    def block_rate(self):
+        return self.blocks / self.pages if self.pages else 0.0
+
+    def stats(self):
+        return {
+            'pages': self.pages,
+            'blocks': self.blocks,
+            'block_rate': self.block_rate,
+            'delay': self.delay,
+            'floor': self.floor,
+        }
+
+
+def wait_for_any(driver, selectors, timeout=15):
+    """
+    Wait until any of the CSS selectors is present on the current page.
+
+    Parameters:
+    - driver: Selenium WebDriver.
+    - selectors (list): CSS selectors, e.g. the results container and a captcha form.
+    - timeout (float): Seconds to wait.
+
+    Returns:
+    - str or None: The first selector found, or None on timeout.
+    """
+    def find(d):
+        for selector in selectors:
+            if d.find_elements(By.CSS_SELECTOR, selector):
+                return selector
+        return False
+
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.25).until(find)
+    except TimeoutException:
+        return None
+
+
+def current_document(driver):
+    """
+    Return the current page's <html> element, to hand to wait_for_navigation
+    after starting a navigation away from it (None if it cannot be read).
+    """
+    try:
+        return driver.find_element(By.TAG_NAME, "html")
+    except WebDriverException:
+        return None
+
+
+def wait_for_navigation(driver, old_document, timeout=15):
+    """
+    Wait until the page captured with current_document has been replaced.
+
+    Non-blocking navigations (window.location.href, clicks) leave the old
+    page in the DOM until the new one commits, so readiness selectors would
+    otherwise match the previous page.
+
+    Parameters:
+    - driver: Selenium WebDriver, switched to the tab that is navigating.
+    - old_document: The <html> element from before the navigation, or None.
+    - timeout (float): Seconds to wait.
+
+    Returns:
+    - bool: True once the old page is gone, False on timeout.
+    """
+    if old_document is None:
+        return True
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(EC.staleness_of(old_document))
+        return True
+    except TimeoutException:
+        return False
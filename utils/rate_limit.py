@@ -0,0 +1,113 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second refill up to `burst`.
+
+    acquire() is safe to call from many coroutines at once; waiters are
+    served in arrival order through the internal lock.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class HostPacer:
+    """
+    Per-host pacing for the async Workday and ATS crawlers: a concurrency
+    semaphore plus a minimum interval between request starts, per host.
+
+    Unlike HostScheduler's token buckets there is no burst, which suits
+    endpoints that throttle on request spacing. Every host has its own
+    clock, so a slow or strict host never holds back the others.
+    """
+
+    def __init__(self, per_host_concurrency=2, min_interval=0.5):
+        self.per_host_concurrency = per_host_concurrency
+        self.min_interval = min_interval
+        self._semaphores = {}
+        self._locks = {}
+        self._next_slot = {}
+
+    def semaphore(self, host):
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._semaphores[host]
+
+    async def wait(self, host):
+        """Sleep until this host's next request slot is free, then claim it."""
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = asyncio.get_running_loop().time()
+            slot = self._next_slot.get(host, now)
+            if slot > now:
+                await asyncio.sleep(slot - now)
+                now = slot
+            self._next_slot[host] = now + self.min_interval
+
+
+class HostScheduler:
+    """
+    Per-host request budgets: every host gets its own token bucket (rate and
+    burst) and its own concurrency semaphore, so hosts never wait on each other.
+
+    Parameters:
+    - rate_limit_rpm (int): Default requests per minute per host (0 = unlimited).
+    - burst (int): Requests a host may fire back to back after being idle.
+    - concurrency (int): Requests in flight per host.
+    - overrides (dict): host -> {"rate_limit_rpm", "burst", "concurrency"} for specific hosts.
+    """
+
+    def __init__(self, rate_limit_rpm=20, burst=1, concurrency=4, overrides=None):
+        self.rate_limit_rpm = rate_limit_rpm
+        self.burst = burst
+        self.concurrency = concurrency
+        self.overrides = overrides or {}
+        self._buckets = {}
+        self._semaphores = {}
+
+    def _limits_for(self, host):
+        limits = self.overrides.get(host, {})
+        return (
+            limits.get("rate_limit_rpm", self.rate_limit_rpm),
+            limits.get("burst", self.burst),
+            limits.get("concurrency", self.concurrency),
+        )
+
+    def _ensure(self, host):
+        if host not in self._buckets:
+            rpm, burst, concurrency = self._limits_for(host)
+            self._buckets[host] = TokenBucket((rpm or 0) / 60.0, burst)
+            self._semaphores[host] = asyncio.Semaphore(max(1, concurrency))
+
+    @asynccontextmanager
+    async def slot(self, url_or_host):
+        """Hold one of the host's concurrency slots, after waiting for a rate token."""
+        host = urlsplit(url_or_host).netloc or url_or_host
+        self._ensure(host)
+        async with self._semaphores[host]:
+            await self._buckets[host].acquire()
+            yield
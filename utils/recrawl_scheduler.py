@@ -0,0 +1,159 @@
+import sqlite3
+import time
+
+from utils.tenant_registry import TENANT_DB
+
+HOUR = 3600
+
+
+class RecrawlScheduler:
+    """
+    Decides which Workday tenants to crawl on this run, from per-tenant stats
+    kept next to the tenant registry.
+
+    Each crawl updates exponentially weighted averages of the tenant's
+    latency, error rate, requests per crawl and posting velocity (new
+    postings per hour). The next crawl is set so that roughly
+    `target_new_per_crawl` postings will have accumulated; tenants that stop
+    changing are pushed back geometrically, towards a quarter of the time
+    since their last change. Due tenants are ranked by expected new postings
+    per unit of crawl cost (requests per crawl, weighted up by error rate and
+    by mean response latency in seconds) and taken until the request budget
+    is spent. Tenants never crawled come first; their first crawl is meant
+    to be capped at `first_crawl_pages` (see workday_search), which is also
+    what it is charged against the budget.
+
+    Parameters:
+    - filename (str): SQLite file (shared with the tenant registry).
+    - min_interval (float), max_interval (float): Bounds on the recrawl interval in seconds.
+    - target_new_per_crawl (float): New postings a crawl should find on average.
+    - growth (float): Interval multiplier after a crawl that found nothing new.
+    - alpha (float): Weight of the newest observation in the averages.
+    - first_crawl_pages (int): Page cap, and so expected requests, of a tenant's first crawl.
+    """
+
+    def __init__(self, filename=TENANT_DB, min_interval=HOUR, max_interval=7 * 24 * HOUR,
+                 target_new_per_crawl=5, growth=1.5, alpha=0.3, first_crawl_pages=10):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new_per_crawl = target_new_per_crawl
+        self.growth = growth
+        self.alpha = alpha
+        self.first_crawl_pages = first_crawl_pages
+        self.conn = sqlite3.connect(filename)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS tenant_schedule (
+                base_url TEXT PRIMARY KEY,
+                crawls INTEGER NOT NULL DEFAULT 0,
+                latency REAL NOT NULL DEFAULT 0,
+                error_rate REAL NOT NULL DEFAULT 0,
+                requests_per_crawl REAL NOT NULL DEFAULT 1,
+                velocity REAL NOT NULL DEFAULT 0,
+                interval REAL NOT NULL,
+                last_crawl REAL,
+                last_change REAL,
+                next_crawl REAL
+            )
+        ''')
+        self.conn.commit()
+
+    def _load(self, base_urls):
+        rows = {row['base_url']: dict(row) for row in self.conn.execute('SELECT * FROM tenant_schedule')}
+        return {url: rows.get(url) for url in base_urls}
+
+    def _priority(self, row, now):
+        """Expected new postings per unit of crawl cost if the tenant were crawled now"""
+        if row is None or row['last_crawl'] is None:
+            return float('inf')
+        hours = (now - row['last_crawl']) / HOUR
+        expected_new = row['velocity'] * hours
+        # A slow tenant holds its host slots longer, so each request costs more
+        cost = max(1.0, row['requests_per_crawl']) * (1 + row['error_rate']) * (1 + row['latency'])
+        return expected_new / cost
+
+    def due(self, base_urls, request_budget=None, now=None):
+        """
+        Pick the tenants to crawl now.
+
+        Parameters:
+        - base_urls (list): Every known tenant URL.
+        - request_budget (int): Stop once the expected requests of picked tenants reach this (None = no limit).
+
+        Returns:
+        - list: Due tenant URLs, highest priority first.
+        """
+        now = now or time.time()
+        rows = self._load(base_urls)
+        due = [url for url, row in rows.items() if row is None or row['next_crawl'] is None or row['next_crawl'] <= now]
+        due.sort(key=lambda url: self._priority(rows[url], now), reverse=True)
+
+        picked, spent = [], 0.0
+        for url in due:
+            cost = rows[url]['requests_per_crawl'] if rows[url] else self.first_crawl_pages
+            if request_budget is not None and picked and spent + cost > request_budget:
+                break
+            picked.append(url)
+            spent += cost
+        print(f"Scheduler: {len(due)} of {len(base_urls)} tenants due, crawling {len(picked)} "
+              f"(~{spent:.0f} requests)")
+        return picked
+
+    def record(self, base_url, stats, now=None):
+        """
+        Fold one crawl's stats into the tenant's averages and schedule its next crawl.
+
+        Parameters:
+        - base_url (str): The tenant crawled.
+        - stats (dict): requests, errors, latency (seconds, summed) and jobs (new postings) from the crawl.
+        """
+        now = now or time.time()
+        row = self.conn.execute('SELECT * FROM tenant_schedule WHERE base_url = ?', (base_url,)).fetchone()
+        row = dict(row) if row else None
+        requests = max(1, stats.get('requests', 0))
+        new_jobs = stats.get('jobs', 0)
+        latency = stats.get('latency', 0.0) / requests
+        error_rate = stats.get('errors', 0) / requests
+        failed = stats.get('errors', 0) >= requests
+
+        if row is None:
+            # The first crawl returns the whole backlog, which says nothing about velocity
+            row = {'crawls': 0, 'latency': latency, 'error_rate': error_rate, 'requests_per_crawl': requests,
+                   'velocity': 0.0, 'interval': self.min_interval, 'last_crawl': None, 'last_change': now}
+        else:
+            a = self.alpha
+            row['latency'] = (1 - a) * row['latency'] + a * latency
+            row['error_rate'] = (1 - a) * row['error_rate'] + a * error_rate
+            if not failed:
+                row['requests_per_crawl'] = (1 - a) * row['requests_per_crawl'] + a * requests
+                if row['last_crawl'] is not None:
+                    hours = max((now - row['last_crawl']) / HOUR, 1 / 60)
+                    row['velocity'] = (1 - a) * row['velocity'] + a * new_jobs / hours
+                if new_jobs:
+                    row['last_change'] = now
+                    if row['velocity'] > 0:
+                        row['interval'] = self.target_new_per_crawl / row['velocity'] * HOUR
+                else:
+                    since_change = now - (row['last_change'] or now)
+                    row['interval'] = max(row['interval'] * self.growth, since_change / 4)
+            row['interval'] = min(self.max_interval, max(self.min_interval, row['interval']))
+
+        if failed:
+            # Retry a failing tenant sooner than its normal cadence, without moving last_crawl
+            next_crawl = now + self.min_interval
+        else:
+            row['last_crawl'] = now
+            next_crawl = now + row['interval'] * (1 + row['error_rate'])
+        self.conn.execute(
+            'INSERT OR REPLACE INTO tenant_schedule (base_url, crawls, latency, error_rate, requests_per_crawl, '
+            'velocity, interval, last_crawl, last_change, next_crawl) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (base_url, row['crawls'] + 1, row['latency'], row['error_rate'], row['requests_per_crawl'],
+             row['velocity'], row['interval'], row['last_crawl'], row['last_change'], next_crawl)
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+CACHE_DIR = 'http_cache'
+# Request headers that change what the server sends back. User-Agent is left
+# out on purpose: SuperClient rotates it, and keying on it would split the cache.
+VARY_HEADERS = ('accept', 'accept-language')
+
+
+def _header(headers, name):
+    """Read a header from a dict or an rnet HeaderMap, returning str or None."""
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.title())
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    return value
+
+
+class CachedResponse:
+    """Minimal stand-in for an rnet Response served from the cache."""
+
+    def __init__(self, url, status_code, headers, body, from_cache=True):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.from_cache = from_cache
+
+    async def bytes(self):
+        return self.body
+
+    async def text(self):
+        return self.body.decode('utf-8', errors='replace')
+
+    async def json(self):
+        return json.loads(self.body)
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache for SuperClient.
+
+    Bodies live as files under `directory`, indexed in SQLite by a hash of the
+    URL and the vary-relevant request headers. Entries younger than their
+    domain's TTL are served without a request; older ones are revalidated
+    with If-None-Match / If-Modified-Since. When the bodies exceed
+    `max_bytes`, the least recently used entries are evicted.
+
+    Parameters:
+    - directory (str): Where bodies and the index are stored.
+    - max_bytes (int): Size budget for stored bodies.
+    - default_ttl (float): Seconds an entry is served without revalidation (0 = always revalidate).
+    - domain_ttls (dict): host -> TTL in seconds, overriding default_ttl.
+    - vary_headers (tuple): Lower-case request header names that are part of the cache key.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=512 * 1024 * 1024, default_ttl=0,
+                 domain_ttls=None, vary_headers=VARY_HEADERS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.domain_ttls = domain_ttls or {}
+        self.vary_headers = vary_headers
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.db'))
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)')
+        self.conn.commit()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def key(self, url, request_headers=None):
+        lowered = {k.lower(): v for k, v in (request_headers or {}).items()}
+        parts = [url] + [f"{name}={lowered.get(name, '')}" for name in self.vary_headers]
+        return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, f"{key}.body")
+
+    def lookup(self, url, request_headers=None):
+        """Return the stored entry for this request as a dict, or None."""
+        key = self.key(url, request_headers)
+        row = self.conn.execute(
+            'SELECT url, status, headers, etag, last_modified, stored_at, size FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or not os.path.exists(self._body_path(key)):
+            return None
+        self.conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+        self.conn.commit()
+        url, status, headers, etag, last_modified, stored_at, size = row
+        return {
+            'key': key, 'url': url, 'status': status, 'headers': json.loads(headers or '{}'),
+            'etag': etag, 'last_modified': last_modified, 'stored_at': stored_at, 'size': size,
+        }
+
+    def is_fresh(self, entry):
+        ttl = self.domain_ttls.get(urlsplit(entry['url']).netloc, self.default_ttl)
+        return ttl > 0 and time.time() - entry['stored_at'] < ttl
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def serve(self, entry, revalidated=False):
+        """Build a response from a stored entry and count it as a hit."""
+        with open(self._body_path(entry['key']), 'rb') as f:
+            body = f.read()
+        if revalidated:
+            self.revalidated += 1
+            self.conn.execute('UPDATE entries SET stored_at = ? WHERE key = ?', (time.time(), entry['key']))
+            self.conn.commit()
+        else:
+            self.hits += 1
+        self.bytes_saved += len(body)
+        return CachedResponse(entry['url'], entry['status'], entry['headers'], body)
+
+    def record_miss(self):
+        self.misses += 1
+
+    def store(self, url, request_headers, status, response_headers, body):
+        etag = _header(response_headers, 'etag')
+        last_modified = _header(response_headers, 'last-modified')
+        cache_control = (_header(response_headers, 'cache-control') or '').lower()
+        if 'no-store' in cache_control:
+            return
+        key = self.key(url, request_headers)
+        with open(self._body_path(key), 'wb') as f:
+            f.write(body)
+        headers = {name: _header(response_headers, name)
+                   for name in ('content-type', 'etag', 'last-modified') if _header(response_headers, name)}
+        now = time.time()
+        self.conn.execute(
+            'INSERT OR REPLACE INTO entries (key, url, status, headers, etag, last_modified, stored_at, last_access, size) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, url, status, json.dumps(headers), etag, last_modified, now, now, len(body))
+        )
+        self.conn.commit()
+        self._evict()
+
+    def _evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute('SELECT key, size FROM entries ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            if os.path.exists(self._body_path(key)):
+                os.remove(self._body_path(key))
+            self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            total -= size
+        self.conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.revalidated) / lookups if lookups else 0.0,
+            'bytes_saved': self.bytes_saved,
+        }
+
+    def close(self):
+        self.conn.close()
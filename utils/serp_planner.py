@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from typing import Tuple
+from urllib.parse import urlsplit
+
+# Google ignores words past the 32nd, and very long queries get truncated
+MAX_QUERY_WORDS = 32
+MAX_QUERY_CHARS = 2048
+# Google stops paging a query after a few hundred results, so a combined
+# query should not be expected to return more than this
+MAX_RESULTS_PER_QUERY = 200
+# Assumed results per run for a clause that has never been queried
+UNKNOWN_YIELD = 20
+
+
+@dataclass(frozen=True)
+class PlannedQuery:
+    text: str
+    clauses: Tuple[str, ...]
+
+
+def clause_matches(clause, url):
+    """Return True if a result URL is one the `site:`/`inurl:` clause would have produced"""
+    if clause.startswith("site:"):
+        domain = clause[len("site:"):].lower()
+        host = urlsplit(url).netloc.lower()
+        return host == domain or host.endswith("." + domain)
+    if clause.startswith("inurl:"):
+        return clause[len("inurl:"):].lower() in url.lower()
+    return False
+
+
+def attribute_hits(clauses, results):
+    """Count results per clause, crediting each result to the first clause it matches"""
+    hits = {clause: 0 for clause in clauses}
+    for r in results:
+        for clause in clauses:
+            if clause_matches(clause, r['url']):
+                hits[clause] += 1
+                break
+    return hits
+
+
+def _render(clauses, suffix):
+    group = clauses[0] if len(clauses) == 1 else "(" + " OR ".join(clauses) + ")"
+    return f"{group} {suffix}".strip()
+
+
+def _fits(clauses, suffix):
+    text = _render(clauses, suffix)
+    return len(text.split()) <= MAX_QUERY_WORDS and len(text) <= MAX_QUERY_CHARS
+
+
+def plan_queries(clauses, locations, keyword_filter="", date_filter="", yields=None,
+                 max_results=MAX_RESULTS_PER_QUERY):
+    """
+    Pack `site:`/`inurl:` clauses into OR-combined queries.
+
+    Clauses whose past yield (results per run, from `yields`) reaches half of
+    `max_results` get a query of their own; the rest are packed, highest yield
+    first, into groups whose expected results stay under `max_results` and
+    whose text stays within Google's word and length limits.
+
+    Parameters:
+    - clauses (list): e.g. ["site:boards.greenhouse.io", "inurl:/apply"].
+    - locations (list): Location expressions, one query set per location.
+    - keyword_filter (str), date_filter (str): Appended to every query.
+    - yields (dict): clause -> average results per run, from SerpResultStore.load_site_yields().
+
+    Returns:
+    - list of PlannedQuery
+    """
+    yields = yields or {}
+    expected = {clause: yields.get(clause, UNKNOWN_YIELD) for clause in clauses}
+    ordered = sorted(clauses, key=lambda c: expected[c], reverse=True)
+
+    planned = []
+    for location in locations:
+        suffix = " ".join(part for part in (location, keyword_filter, date_filter) if part)
+        group, group_yield = [], 0.0
+        for clause in ordered:
+            if expected[clause] >= max_results / 2:
+                planned.append(PlannedQuery(_render([clause], suffix), (clause,)))
+                continue
+            if group and (group_yield + expected[clause] > max_results or not _fits(group + [clause], suffix)):
+                planned.append(PlannedQuery(_render(group, suffix), tuple(group)))
+                group, group_yield = [], 0.0
+            group.append(clause)
+            group_yield += expected[clause]
+        if group:
+            planned.append(PlannedQuery(_render(group, suffix), tuple(group)))
+    return planned
@@ -0,0 +1,183 @@
+import csv
+import json
+import sqlite3
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+SERP_DB = 'google_search_urls.db'
+TRACKING_PARAMS = ('utm_', 'gclid', 'fbclid', 'gh_src', 'lever-source')
+
+
+def canonical_url(url):
+    """
+    Normalise a result URL so the same posting found through different
+    queries or runs maps to one key.
+
+    Parameters:
+    - url (str): The URL as scraped.
+
+    Returns:
+    - str: Lower-cased scheme/host, no fragment, no tracking parameters, no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAMS)]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+class SerpResultStore:
+    """
+    Append-only SQLite sink for SERP results with a unique index on the
+    canonical URL. Rows are written in batches. Dedupe checks an in-memory
+    set seeded from the table, so it is O(1) per result across all queries
+    and every past run.
+    """
+
+    def __init__(self, filename=SERP_DB, batch_size=100):
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS serp_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                canonical_url TEXT NOT NULL UNIQUE,
+                url TEXT NOT NULL,
+                title TEXT,
+                query TEXT,
+                first_seen DATETIME
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS serp_checkpoints (
+                query TEXT PRIMARY KEY,
+                page INTEGER NOT NULL,
+                next_url TEXT,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at DATETIME
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS serp_site_yield (
+                clause TEXT PRIMARY KEY,
+                runs INTEGER NOT NULL DEFAULT 0,
+                pages INTEGER NOT NULL DEFAULT 0,
+                hits INTEGER NOT NULL DEFAULT 0,
+                updated_at DATETIME
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS serp_plan (
+                position INTEGER PRIMARY KEY,
+                query TEXT NOT NULL,
+                clauses TEXT NOT NULL
+            )
+        ''')
+        self.conn.commit()
+        self._seen = {row[0] for row in self.conn.execute('SELECT canonical_url FROM serp_results')}
+        self._pending = []
+
+    def __len__(self):
+        return len(self._seen)
+
+    def add(self, query, results):
+        """Queue the results not seen before and return them"""
+        new_results = []
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for r in results:
+            key = canonical_url(r['url'])
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            new_results.append(r)
+            self._pending.append((key, r['url'], r.get('title', ''), query, now))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return new_results
+
+    def _write_pending(self):
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO serp_results (canonical_url, url, title, query, first_seen) '
+            'VALUES (?, ?, ?, ?, ?)',
+            self._pending
+        )
+        self._pending = []
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self.conn:
+            self._write_pending()
+
+    def checkpoint(self, query, page, next_url, completed=False):
+        """
+        Record that `page` of `query` is done and where the next page lives.
+        Pending results are written in the same transaction, so a resumed run
+        never skips a page whose results were lost.
+        """
+        with self.conn:
+            self._write_pending()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO serp_checkpoints (query, page, next_url, completed, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (query, page, next_url, int(completed), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+
+    def load_checkpoints(self):
+        """Return {query: (page, next_url, completed)} from previous runs"""
+        return {
+            query: (page, next_url, bool(completed))
+            for query, page, next_url, completed in self.conn.execute(
+                'SELECT query, page, next_url, completed FROM serp_checkpoints'
+            )
+        }
+
+    def reset_checkpoints(self):
+        """Forget the current sweep: its checkpoints and its query plan"""
+        with self.conn:
+            self.conn.execute('DELETE FROM serp_checkpoints')
+            self.conn.execute('DELETE FROM serp_plan')
+
+    def save_plan(self, planned):
+        """Freeze the query plan of a sweep so a resumed run uses the same queries"""
+        with self.conn:
+            self.conn.execute('DELETE FROM serp_plan')
+            self.conn.executemany(
+                'INSERT INTO serp_plan (position, query, clauses) VALUES (?, ?, ?)',
+                [(i, query, json.dumps(list(clauses))) for i, (query, clauses) in enumerate(planned)]
+            )
+
+    def load_plan(self):
+        """Return [(query, clauses)] of the sweep in progress, or [] if none"""
+        return [(query, tuple(json.loads(clauses)))
+                for query, clauses in self.conn.execute('SELECT query, clauses FROM serp_plan ORDER BY position')]
+
+    def record_site_yield(self, hits_by_clause, pages):
+        """Add one query run's results per `site:`/`inurl:` clause to the yield stats"""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO serp_site_yield (clause, runs, pages, hits, updated_at) VALUES (?, 1, ?, ?, ?) '
+                'ON CONFLICT(clause) DO UPDATE SET runs = runs + 1, pages = pages + excluded.pages, '
+                'hits = hits + excluded.hits, updated_at = excluded.updated_at',
+                [(clause, pages, hits, now) for clause, hits in hits_by_clause.items()]
+            )
+
+    def load_site_yields(self):
+        """Return {clause: average results per query run}"""
+        return {clause: hits / runs
+                for clause, runs, hits in self.conn.execute('SELECT clause, runs, hits FROM serp_site_yield')
+                if runs}
+
+    def export_csv(self, filename):
+        """Write the whole table out as CSV (query, url, title) for downstream scripts"""
+        self.flush()
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['query', 'url', 'title'])
+            writer.writerows(self.conn.execute('SELECT query, url, title FROM serp_results ORDER BY id'))
+        print(f"\n[INFO] Exported {len(self)} total URLs to {filename}")
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,82 @@
+import json
+import os
+from urllib.parse import urlsplit
+
+STRATEGY_FILE = 'fetch_strategy.json'
+TIERS = ("http", "browser")
+
+
+class StrategyCache:
+    """
+    Remembers, per domain, which fetch tier gets through and how often each
+    tier is blocked, so SuperClient.fetch can go straight to the tier that works.
+
+    Counts decay on every update so a domain that changed its bot protection
+    is re-learned within a handful of requests. Domains pinned to the browser
+    get the cheaper HTTP tier re-probed every `reprobe_every` fetches.
+
+    Parameters:
+    - filename (str): JSON file the stats persist to (None = in memory only).
+    - reprobe_every (int): Browser fetches between HTTP re-probes.
+    - block_threshold (float): Decayed HTTP block rate at which a domain switches to the browser.
+    - min_samples (float): Decayed HTTP attempts needed before that rate is trusted.
+    - decay (float): Weight kept by old observations on each new one.
+    """
+
+    def __init__(self, filename=STRATEGY_FILE, reprobe_every=20, block_threshold=0.5, min_samples=1.5, decay=0.8):
+        self.filename = filename
+        self.reprobe_every = reprobe_every
+        self.block_threshold = block_threshold
+        self.min_samples = min_samples
+        self.decay = decay
+        self.domains = {}
+        if filename and os.path.exists(filename):
+            with open(filename, 'r', encoding='utf-8') as f:
+                self.domains = json.load(f)
+
+    @staticmethod
+    def domain_of(url):
+        return urlsplit(url).netloc.lower()
+
+    def _stats(self, domain):
+        if domain not in self.domains:
+            self.domains[domain] = {
+                "preferred": "http",
+                "since_probe": 0,
+                **{tier: {"ok": 0.0, "blocked": 0.0} for tier in TIERS},
+            }
+        return self.domains[domain]
+
+    def plan(self, url):
+        """Return the tiers to try for `url`, cheapest first."""
+        stats = self._stats(self.domain_of(url))
+        if stats["preferred"] == "browser":
+            stats["since_probe"] += 1
+            if stats["since_probe"] < self.reprobe_every:
+                return ["browser"]
+            stats["since_probe"] = 0
+        return list(TIERS)
+
+    def record(self, url, tier, blocked):
+        stats = self._stats(self.domain_of(url))
+        counts = stats[tier]
+        counts["ok"] = counts["ok"] * self.decay + (0 if blocked else 1)
+        counts["blocked"] = counts["blocked"] * self.decay + (1 if blocked else 0)
+
+        if tier != "http":
+            return
+        attempts = counts["ok"] + counts["blocked"]
+        if blocked and attempts >= self.min_samples and counts["blocked"] / attempts >= self.block_threshold:
+            stats["preferred"] = "browser"
+        elif not blocked and stats["preferred"] == "browser":
+            # A successful re-probe moves the domain back to plain HTTP
+            stats["preferred"] = "http"
+            stats["since_probe"] = 0
+
+    def save(self):
+        if not self.filename:
+            return
+        tmp_filename = f"{self.filename}.tmp"
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
+            json.dump(self.domains, f, indent=2)
+        os.replace(tmp_filename, self.filename)
@@ -0,0 +1,87 @@
+import sqlite3
+from datetime import datetime
+
+TENANT_DB = 'workday_tenants.db'
+
+
+class TenantRegistry:
+    """
+    Persistent set of Workday tenants (one row per CXS jobs URL).
+
+    New SERP results are merged with an upsert, so the registry only grows:
+    known tenants get their last_seen bumped, new ones are inserted. A
+    per-source cursor remembers how far each input has been read, so a
+    re-run only normalises rows added since.
+    """
+
+    def __init__(self, filename=TENANT_DB):
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS workday_tenants (
+                base_url TEXT PRIMARY KEY,
+                company TEXT NOT NULL,
+                host TEXT NOT NULL,
+                career_site TEXT NOT NULL,
+                source_url TEXT,
+                first_seen DATETIME,
+                last_seen DATETIME
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS registry_cursors (
+                source TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM workday_tenants').fetchone()[0]
+
+    def upsert(self, tenants, source=None, last_id=None):
+        """
+        Merge normalised tenants into the registry.
+
+        Parameters:
+        - tenants (iterable): (base_url, company, host, career_site, source_url) tuples.
+        - source (str), last_id (int): Advance this source's cursor in the same transaction.
+
+        Returns:
+        - int: Number of tenants that were not in the registry before.
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        before = len(self)
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO workday_tenants (base_url, company, host, career_site, source_url, first_seen, last_seen) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(base_url) DO UPDATE SET last_seen = excluded.last_seen',
+                [(*tenant, now, now) for tenant in tenants]
+            )
+            if source is not None and last_id is not None:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO registry_cursors (source, last_id) VALUES (?, ?)', (source, last_id)
+                )
+        return len(self) - before
+
+    def cursor(self, source):
+        """Return the last row id already read from `source` (0 if never read)"""
+        row = self.conn.execute('SELECT last_id FROM registry_cursors WHERE source = ?', (source,)).fetchone()
+        return row[0] if row else 0
+
+    def base_urls(self):
+        """Return every tenant's CXS jobs URL, oldest first"""
+        return [row[0] for row in self.conn.execute('SELECT base_url FROM workday_tenants ORDER BY first_seen, base_url')]
+
+    def close(self):
+        self.conn.close()
+
+
+def load_tenant_urls(filename=TENANT_DB):
+    """Open the registry, read its CXS jobs URLs and close it again"""
+    registry = TenantRegistry(filename)
+    try:
+        return registry.base_urls()
+    finally:
+        registry.close()
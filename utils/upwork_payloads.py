@@ -0,0 +1,76 @@
+UPWORK_JOB_URL = "https://www.upwork.com/jobs/{ciphertext}"
+
+# Keys that carry a job's public id; ciphertext ("~01ab...") is what job URLs use
+ID_KEYS = ('ciphertext', 'cipherText', 'uid', 'id')
+DESCRIPTION_KEYS = ('description', 'descriptionText', 'snippet')
+
+
+def _find_key(obj, key, depth=3):
+    """Depth-limited search for the first value stored under `key` in nested dicts/lists"""
+    if depth < 0:
+        return None
+    if isinstance(obj, dict):
+        if obj.get(key) not in (None, ''):
+            return obj[key]
+        children = obj.values()
+    elif isinstance(obj, list):
+        children = obj
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (dict, list)):
+            found = _find_key(child, key, depth - 1)
+            if found not in (None, ''):
+                return found
+    return None
+
+
+def _looks_like_job(obj):
+    return (isinstance(obj.get('title'), str)
+            and any(isinstance(obj.get(k), str) for k in DESCRIPTION_KEYS)
+            and any(obj.get(k) not in (None, '') for k in ID_KEYS + ('jobTile', 'job')))
+
+
+def find_job_objects(payload):
+    """
+    Walk a decoded search/feed response and yield every object that looks
+    like a job posting (a title, a description and an id or nested job).
+
+    Matching on shape instead of on a fixed GraphQL path keeps working when
+    Upwork renames or nests its query fields. A matched object is not
+    descended into further, so a job is never yielded twice.
+    """
+    stack = [payload]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            if _looks_like_job(obj):
+                yield obj
+                continue
+            stack.extend(v for v in obj.values() if isinstance(v, (dict, list)))
+        elif isinstance(obj, list):
+            stack.extend(v for v in reversed(obj) if isinstance(v, (dict, list)))
+
+
+def normalize_job(obj):
+    """
+    Flatten a captured job object into the fields the scrapers store.
+
+    Parameters:
+    - obj (dict): One object from find_job_objects.
+
+    Returns:
+    - dict: job_id, title, description, url, posted_on, plus the untouched object under 'raw'.
+    """
+    ciphertext = _find_key(obj, 'ciphertext') or _find_key(obj, 'cipherText')
+    job_id = ciphertext or next((str(obj[k]) for k in ID_KEYS if obj.get(k) not in (None, '')), None)
+    description = next((obj[k] for k in DESCRIPTION_KEYS if isinstance(obj.get(k), str)), '')
+    return {
+        'job_id': job_id,
+        'title': obj.get('title', '').strip(),
+        'description': description.strip(),
+        'url': UPWORK_JOB_URL.format(ciphertext=ciphertext) if ciphertext else None,
+        'posted_on': (_find_key(obj, 'publishTime') or _find_key(obj, 'publishedOn')
+                      or _find_key(obj, 'createdOn') or _find_key(obj, 'createTime')),
+        'raw': obj,
+    }
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+
+CACHE_FILE = 'workday_details.db'
+
+
+def posting_fingerprint(job):
+    """
+    Fingerprint the list-level fields of a posting that change when the job itself does.
+
+    Parameters:
+    - job (dict): A jobPostings entry from the CXS jobs endpoint.
+
+    Returns:
+    - str: An MD5 hex digest. postedOn is left out because Workday renders it
+      relative to today ("Posted 3 Days Ago") and it changes daily on its own.
+    """
+    fields = [job.get('title'), job.get('locationsText'), job.get('bulletFields')]
+    return hashlib.md5(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class DetailCache:
+    """On-disk cache of CXS job details keyed by (tenant, externalPath)."""
+
+    def __init__(self, filename=CACHE_FILE):
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS job_details (
+                tenant TEXT NOT NULL,
+                external_path TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                detail TEXT NOT NULL,
+                fetched_at DATETIME,
+                PRIMARY KEY (tenant, external_path)
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, tenant, external_path, fingerprint):
+        """Return the cached detail if it was stored for the same fingerprint, else None."""
+        row = self.conn.execute(
+            'SELECT fingerprint, detail FROM job_details WHERE tenant = ? AND external_path = ?',
+            (tenant, external_path)
+        ).fetchone()
+        if row is None or row[0] != fingerprint:
+            return None
+        return json.loads(row[1])
+
+    def put(self, tenant, external_path, fingerprint, detail):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO job_details (tenant, external_path, fingerprint, detail, fetched_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (tenant, external_path, fingerprint, json.dumps(detail, ensure_ascii=False),
+             datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,88 @@
+import json
+import os
+from datetime import datetime
+from urllib.parse import urlsplit
+
+STATE_FILE = 'workday_state.json'
+# Workday orders by postedOn with day granularity, so postings from the same day
+# can shuffle between runs. Remembering a window of recent paths (not just the
+# newest one) lets us recognise "already seen" even when the top entry moved.
+RECENT_PATHS_KEPT = 50
+
+
+def tenant_key(base_url):
+    """
+    Build a stable key for a tenant from its CXS jobs URL.
+
+    Parameters:
+    - base_url (str): The Workday CXS jobs URL, possibly with a query string.
+
+    Returns:
+    - str: scheme://host/path with the query string dropped.
+    """
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def load_high_water_marks(filename=STATE_FILE):
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_high_water_marks(marks, filename=STATE_FILE):
+    # Write to a temp file first so a crash mid-write never corrupts the state
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
+        json.dump(marks, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_filename, filename)
+
+
+def split_at_known(jobs, mark):
+    """
+    Split a page of postings at the first one we have already seen.
+
+    Parameters:
+    - jobs (list): Postings in the order the endpoint returned them (newest first).
+    - mark (dict): The tenant's high-water mark, or None.
+
+    Returns:
+    - tuple: (new_jobs, reached_known) where reached_known tells the caller to stop paging.
+    """
+    if not mark:
+        return jobs, False
+    known_paths = set(mark.get('recent_paths', []))
+    known_paths.add(mark.get('externalPath'))
+    for idx, job in enumerate(jobs):
+        if job.get('externalPath') in known_paths:
+            return jobs[:idx], True
+    return jobs, False
+
+
+def update_high_water_mark(marks, base_url, new_jobs, complete=True):
+    """
+    Record the newest postings of a tenant so the next run stops at them.
+
+    Parameters:
+    - new_jobs (list): The postings that are new since the tenant's mark, newest first.
+    - complete (bool): Whether paging reached a known posting or the end of the
+      board. An incomplete crawl (page cap, error) leaves an existing mark alone,
+      so the postings between where it stopped and the old mark are fetched next run.
+    """
+    if not new_jobs:
+        return
+    key = tenant_key(base_url)
+    if not complete and marks.get(key):
+        return
+    previous = marks.get(key, {})
+    paths = [job.get('externalPath') for job in new_jobs if job.get('externalPath')]
+    if not paths:
+        return
+    recent_paths = list(dict.fromkeys(paths + previous.get('recent_paths', [])))
+    marks[key] = {
+        'postedOn': new_jobs[0].get('postedOn'),
+        'externalPath': paths[0],
+        'recent_paths': recent_paths[:RECENT_PATHS_KEPT],
+        'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
@@ -1,32 +1,67 @@
+import asyncio
 import requests
 import json
+import os
 import time
-import pandas as pd
+import aiohttp
+from collections import deque
 from datetime import datetime
+from urllib.parse import urlsplit
+from utils.workday_state import (
+    load_high_water_marks, save_high_water_marks, split_at_known, tenant_key, update_high_water_mark
+)
+from utils.workday_cache import DetailCache, posting_fingerprint
+from utils.tenant_registry import load_tenant_urls
+from utils.recrawl_scheduler import RecrawlScheduler
+from utils.rate_limit import HostPacer
 
-def scrape_workday_jobs(base_urls, search_text="", max_jobs=None):
+WORKDAY_HEADERS = {
+    'Accept': 'application/json',
+    'Content-Type': 'application/json'
+}
+PAGE_LIMIT = 20
+# Tenants with more postings than this are split into facet partitions
+SHARD_THRESHOLD = 200
+# Deep offsets on the CXS endpoint stop returning results, so any single
+# (faceted) result set is only paged up to here
+OFFSET_CEILING = 2000
+# High-water marks stop paging at the first known posting, which is only
+# sound when postings come newest first, so every list request asks for it
+ORDER_BY_NEWEST = "$orderby=postedOn%20desc"
+
+
+def ordered_jobs_url(base_url):
+    """Add the newest-first ordering to a CXS jobs URL unless it already sets one"""
+    if '$orderby' in base_url:
+        return base_url
+    return f"{base_url}{'&' if '?' in base_url else '?'}{ORDER_BY_NEWEST}"
+
+def iter_workday_pages(base_urls, search_text="", high_water_marks=None):
     """
-    Scrape job listings from multiple Workday careers portals.
+    Generator behind scrape_workday_jobs: yields (base_url, jobs) for each page
+    as soon as it is fetched, so callers can stream postings out mid-crawl.
 
     Args:
         base_urls: List of Workday jobs URLs (with query filter)
         search_text: Optional search keyword
-        max_jobs: Maximum number of jobs to fetch (None = all jobs)
+        high_water_marks: Optional dict from utils.workday_state. When given,
+            paging stops at the first posting seen on a previous run and the
+            dict is updated in place once a tenant is fully consumed. A tenant
+            with a mark is paged past the usual two pages until it reaches it.
     """
-    headers = {
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
-    
-    all_jobs = []
+    headers = WORKDAY_HEADERS
     
     for base_url in base_urls:
         print(f"\nScraping jobs from: {base_url}")
         offset = 0
-        limit = 20
+        limit = PAGE_LIMIT
         x = 0
+        mark = high_water_marks.get(tenant_key(base_url)) if high_water_marks is not None else None
+        tenant_jobs = []
+        complete = False
 
-        while x < 2:
+        # With a mark, keep paging until it is reached so no new posting is skipped
+        while (x < 2 or mark) and offset < OFFSET_CEILING:
             x += 1
             payload = {
                 "appliedFacets": {},
@@ -36,7 +71,7 @@ def scrape_workday_jobs(base_urls, search_text="", max_jobs=None):
             }
             
             try:
-                response = requests.post(base_url, headers=headers, json=payload)
+                response = requests.post(ordered_jobs_url(base_url), headers=headers, json=payload)
                 response.raise_for_status()
                 
                 data = response.json()
@@ -44,65 +79,685 @@ def scrape_workday_jobs(base_urls, search_text="", max_jobs=None):
                 
                 if not jobs:
                     print("No more jobs found for this company.")
+                    complete = True
                     break
                 
-                all_jobs.extend(jobs)
-                print(f"Retrieved {len(jobs)} jobs. Total so far: {len(all_jobs)}")
+                new_jobs, reached_known = split_at_known(jobs, mark)
+                tenant_jobs.extend(new_jobs)
+                if new_jobs:
+                    # If the caller stops consuming here, the tenant's mark is
+                    # left alone so the postings it never saw are refetched
+                    yield base_url, new_jobs
                 
-                # Check if we've reached max_jobs
-                if max_jobs and len(all_jobs) >= max_jobs:
-                    all_jobs = all_jobs[:max_jobs]
-                    print(f"Reached maximum job limit ({max_jobs})")
-                    return all_jobs
+                if reached_known:
+                    print("Reached postings seen on a previous run.")
+                    complete = True
+                    break
                 
                 if len(jobs) < limit:
                     print("Retrieved all available jobs for this company.")
+                    complete = True
                     break
                 
                 offset += limit
+                # Deeper offsets return nothing, so this is as far as the board goes
+                complete = offset >= OFFSET_CEILING
                 time.sleep(0.5)  # Rate limiting
                 
             except requests.exceptions.RequestException as e:
                 print(f"Error fetching jobs from {base_url}: {e}")
                 break
+        
+        if high_water_marks is not None:
+            update_high_water_mark(high_water_marks, base_url, tenant_jobs, complete)
+
+
+def scrape_workday_jobs(base_urls, search_text="", max_jobs=None, high_water_marks=None):
+    """
+    Scrape job listings from multiple Workday careers portals.
+
+    Args:
+        base_urls: List of Workday jobs URLs (with query filter)
+        search_text: Optional search keyword
+        max_jobs: Maximum number of jobs to fetch (None = all jobs)
+        high_water_marks: Optional dict from utils.workday_state (see iter_workday_pages)
+    """
+    all_jobs = []
+    pages = iter_workday_pages(base_urls, search_text=search_text, high_water_marks=high_water_marks)
+    
+    for _, jobs in pages:
+        all_jobs.extend(jobs)
+        print(f"Retrieved {len(jobs)} jobs. Total so far: {len(all_jobs)}")
+        
+        # Check if we've reached max_jobs
+        if max_jobs and len(all_jobs) >= max_jobs:
+            pages.close()
+            all_jobs = all_jobs[:max_jobs]
+            print(f"Reached maximum job limit ({max_jobs})")
+            return all_jobs
     
     return all_jobs
 
 
-def save_jobs_to_file(jobs, filename="workday_jobs.txt"):
+class BudgetExhausted(Exception):
+    """Raised instead of sending a request once the crawl's RequestBudget is spent."""
+
+
+class RequestBudget:
+    """
+    Hard cap on the requests one crawl sends. Requests are charged when they
+    get their slot, so tenants that have not started by then are skipped.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.spent = 0
+        self.exhausted = False
+
+    def take(self):
+        if self.spent >= self.limit:
+            if not self.exhausted:
+                self.exhausted = True
+                print(f"Request budget of {self.limit} spent; skipping the remaining requests.")
+            raise BudgetExhausted(f"request budget of {self.limit} spent")
+        self.spent += 1
+
+
+async def _post_jobs_page(session, pacer, global_limit, base_url, payload, stats=None, budget=None):
+    host = urlsplit(base_url).netloc
+    async with pacer.semaphore(host):
+        await pacer.wait(host)
+        async with global_limit:
+            if budget is not None:
+                budget.take()
+            # Latency covers the request itself, not the queueing for a slot above
+            start = time.monotonic()
+            try:
+                async with session.post(ordered_jobs_url(base_url), json=payload) as response:
+                    response.raise_for_status()
+                    page = await response.json(content_type=None)
+            finally:
+                if stats is not None:
+                    stats['latency'] = stats.get('latency', 0) + time.monotonic() - start
+    # A maintenance page or an error object is a failed request, like a bad status
+    if not isinstance(page, dict):
+        raise ValueError(f"Unexpected response from {base_url}: {type(page).__name__}")
+    return page
+
+
+def flatten_facets(facets):
+    """
+    Flatten the nested `facets` metadata of a CXS jobs response into
+    {facetParameter: [(value_id, count), ...]}. Location facets come nested
+    under a group (e.g. locationMainGroup -> locations), so walk recursively.
+    """
+    flat = {}
+
+    def walk(facet):
+        param = facet.get('facetParameter')
+        for value in facet.get('values', []):
+            if 'facetParameter' in value:
+                walk(value)
+            elif param and 'id' in value:
+                flat.setdefault(param, []).append((value['id'], value.get('count', 0)))
+
+    for facet in facets or []:
+        walk(facet)
+    return flat
+
+
+def choose_partition(facets, total, applied):
+    """
+    Pick the facet to split a result set on: one not already applied whose
+    buckets add up to at least `total` (so every posting lands in some bucket),
+    preferring the one whose largest bucket is smallest.
+
+    Returns:
+        (facetParameter, [(value_id, count), ...]) or None
+    """
+    best = None
+    for param, values in flatten_facets(facets).items():
+        if param in applied or len(values) < 2:
+            continue
+        if sum(count for _, count in values) < total:
+            continue
+        largest = max(count for _, count in values)
+        if best is None or largest < best[0]:
+            best = (largest, param, values)
+    return (best[1], best[2]) if best else None
+
+
+async def _crawl_tenant_async(session, pacer, global_limit, base_url, search_text="", max_pages=2,
+                              mark=None, on_page=None, shard_threshold=SHARD_THRESHOLD, stats=None,
+                              keep_jobs=True, first_crawl_pages=None, budget=None):
+    """
+    Fetch one tenant's postings. The first page tells us `total`, so the
+    remaining offsets are requested concurrently (bounded by the host's
+    semaphore) and stitched back together in offset order.
+
+    Tenants with more than `shard_threshold` postings are split into facet
+    partitions (location, job family, ...) that are crawled in parallel, and
+    partitions still past OFFSET_CEILING are split again on another facet.
+    Sharding only happens when `max_pages` is None: partitions are crawled
+    in parallel, so a cap could only be applied after every page had
+    already gone to `on_page`.
+
+    With a high-water mark the tenant is walked one page at a time instead,
+    stopping at the first posting seen on a previous run; `max_pages` does
+    not apply then, so no posting between the cap and the mark is skipped.
+    `on_page`, if given, is called with (base_url, jobs) as each page
+    arrives. `stats`, if given, is a dict whose requests/errors/latency/jobs
+    counters are updated in place.
+
+    Returns (jobs, complete), where complete tells whether paging reached a
+    known posting or the end of the board (see update_high_water_mark).
+    With keep_jobs=False (streaming, where on_page already has every page)
+    only the first page's new postings are returned, which is all the
+    high-water mark needs.
+
+    A tenant without a mark is capped at `first_crawl_pages` when given.
+    With a RequestBudget, BudgetExhausted propagates once it is spent.
+    """
+    if not mark and first_crawl_pages:
+        max_pages = min(max_pages or first_crawl_pages, first_crawl_pages)
+    seen_paths = set()
+    if stats is None:
+        stats = {}
+    for counter in ('requests', 'errors', 'latency', 'jobs'):
+        stats.setdefault(counter, 0)
+    errors_before = stats['errors']
+
+    def payload(offset, applied=None):
+        return {
+            "appliedFacets": applied or {},
+            "limit": PAGE_LIMIT,
+            "offset": offset,
+            "searchText": search_text
+        }
+
+    async def fetch(offset, applied=None):
+        try:
+            page = await _post_jobs_page(session, pacer, global_limit, base_url, payload(offset, applied),
+                                         stats, budget)
+        except BudgetExhausted:
+            raise
+        except Exception:
+            stats['requests'] += 1
+            stats['errors'] += 1
+            raise
+        stats['requests'] += 1
+        page_jobs = page.get('jobPostings', [])
+        new_jobs, reached_known = split_at_known(page_jobs, mark)
+        # Overlapping facet buckets can return the same posting twice
+        new_jobs = [job for job in new_jobs if job.get('externalPath') not in seen_paths]
+        seen_paths.update(job.get('externalPath') for job in new_jobs)
+        stats['jobs'] += len(new_jobs)
+        if on_page and new_jobs:
+            on_page(base_url, new_jobs)
+        return page, page_jobs, new_jobs, reached_known
+
+    async def fetch_new(offset, applied=None):
+        # Only the new postings outlive the request, and only if the caller keeps them
+        new_jobs = (await fetch(offset, applied))[2]
+        return new_jobs if keep_jobs else []
+
+    async def fetch_offsets(offsets, applied=None):
+        jobs = []
+        pages = await asyncio.gather(*(fetch_new(o, applied) for o in offsets), return_exceptions=True)
+        for offset, page in zip(offsets, pages):
+            if isinstance(page, BudgetExhausted):
+                raise page
+            if isinstance(page, Exception):
+                print(f"Error fetching offset {offset} {applied or ''} from {base_url}: {page}")
+                continue
+            jobs.extend(page)
+        return jobs
+
+    async def crawl_partition(first, applied):
+        # `first` is the offset-0 response for `applied`, already emitted
+        total = first.get('total') or 0
+        if total > OFFSET_CEILING:
+            partition = choose_partition(first.get('facets'), total, applied)
+            if partition:
+                return await split_partition(applied, *partition)
+            print(f"No facet left to split {applied} ({total} jobs) on {base_url}; "
+                  f"stopping at offset {OFFSET_CEILING}")
+        end = min(total, OFFSET_CEILING)
+        return await fetch_offsets(range(PAGE_LIMIT, end, PAGE_LIMIT), applied)
+
+    async def split_partition(applied, param, values):
+        async def crawl_bucket(value_id):
+            bucket = {**applied, param: [value_id]}
+            try:
+                first, _, jobs, _ = await fetch(0, bucket)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(f"Error fetching facet {bucket} from {base_url}: {e}")
+                return []
+            rest = await crawl_partition(first, bucket)
+            return jobs + rest if keep_jobs else []
+
+        print(f"Sharding {base_url} on '{param}' into {len(values)} partitions")
+        buckets = await asyncio.gather(*(crawl_bucket(value_id) for value_id, count in values if count))
+        return [job for bucket_jobs in buckets for job in bucket_jobs]
+
+    try:
+        first, first_jobs, jobs, reached_known = await fetch(0)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"Error fetching jobs from {base_url}: {e}")
+        return [], False
+
+    if not first_jobs:
+        print(f"No jobs found for {base_url}")
+        return [], True
+    if reached_known or len(first_jobs) < PAGE_LIMIT:
+        print(f"Retrieved {len(jobs)} jobs from {base_url}")
+        return jobs, True
+    if max_pages == 1 and not mark:
+        print(f"Retrieved {len(jobs)} jobs from {base_url}")
+        return jobs, False
+
+    total = first.get('total') or 0
+    page_cap = max_pages * PAGE_LIMIT if max_pages else None
+    if total and not mark and total > shard_threshold and page_cap is None:
+        # The unfaceted first page stays at the front so the newest postings
+        # (and therefore the high-water mark) come first
+        partition = choose_partition(first.get('facets'), total, {})
+        if partition:
+            jobs.extend(await split_partition({}, *partition))
+        else:
+            jobs.extend(await crawl_partition(first, {}))
+        complete = stats['errors'] == errors_before
+    elif total and not mark:
+        end = min(total, page_cap or total, OFFSET_CEILING)
+        jobs.extend(await fetch_offsets(range(PAGE_LIMIT, end, PAGE_LIMIT)))
+        complete = stats['errors'] == errors_before and end == total
+    else:
+        # Incremental run or no total reported: walk offsets one page at a time
+        offset = PAGE_LIMIT
+        complete = False
+        while (mark or page_cap is None or offset < page_cap) and offset < OFFSET_CEILING:
+            try:
+                _, page_jobs, new_jobs, reached_known = await fetch(offset)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(f"Error fetching offset {offset} from {base_url}: {e}")
+                break
+            if keep_jobs:
+                jobs.extend(new_jobs)
+            if reached_known or len(page_jobs) < PAGE_LIMIT:
+                complete = True
+                break
+            offset += PAGE_LIMIT
+            # Deeper offsets return nothing, so this is as far as the board goes
+            complete = offset >= OFFSET_CEILING
+
+    print(f"Retrieved {stats['jobs']} jobs from {base_url}")
+    return jobs, complete
+
+
+async def _run_async_crawl(base_urls, search_text, max_pages, max_concurrency, per_tenant_concurrency,
+                           per_tenant_delay, timeout, marks, on_page=None, shard_threshold=SHARD_THRESHOLD,
+                           crawl_stats=None, on_tenant_done=None, first_crawl_pages=None, request_budget=None):
+    """
+    Crawl every tenant concurrently and return their (jobs, complete) results in input order.
+    If `crawl_stats` is a dict, it gets base_url -> {requests, errors, latency, jobs}.
+
+    With `on_tenant_done`, each tenant's (base_url, first_page_jobs, complete)
+    is handed to it as soon as the tenant finishes and nothing is returned,
+    so a streaming crawl holds no per-tenant job lists.
+
+    With `request_budget`, no request is sent once that many have been;
+    tenants cut short by it get 'budget_cut' in their stats.
+    """
+    pacer = HostPacer(per_host_concurrency=per_tenant_concurrency, min_interval=per_tenant_delay)
+    global_limit = asyncio.Semaphore(max_concurrency)
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_tenant_concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    crawl_stats = crawl_stats if crawl_stats is not None else {}
+    budget = RequestBudget(request_budget) if request_budget is not None else None
+
+    async def crawl(session, url):
+        stats = crawl_stats.setdefault(url, {})
+        try:
+            jobs, complete = await _crawl_tenant_async(session, pacer, global_limit, url, search_text, max_pages,
+                                                       mark=marks.get(tenant_key(url)), on_page=on_page,
+                                                       shard_threshold=shard_threshold, stats=stats,
+                                                       keep_jobs=on_tenant_done is None,
+                                                       first_crawl_pages=first_crawl_pages, budget=budget)
+        except BudgetExhausted:
+            # Not a failure of the tenant: it simply was not (fully) crawled this run
+            stats['budget_cut'] = True
+            jobs, complete = [], False
+        except Exception as e:
+            # One broken tenant must not discard the others' postings
+            print(f"Error crawling {url}: {e!r}")
+            stats['errors'] = max(stats.get('errors', 0), 1)
+            jobs, complete = [], False
+        if on_tenant_done:
+            on_tenant_done(url, jobs, complete)
+            return None
+        return jobs, complete
+
+    async with aiohttp.ClientSession(headers=WORKDAY_HEADERS, connector=connector, timeout=client_timeout) as session:
+        results = await asyncio.gather(*(crawl(session, url) for url in base_urls))
+    return None if on_tenant_done else results
+
+
+async def scrape_workday_jobs_async(base_urls, search_text="", max_jobs=None, max_pages=2,
+                                    max_concurrency=20, per_tenant_concurrency=2,
+                                    per_tenant_delay=0.5, timeout=30, high_water_marks=None,
+                                    shard_threshold=SHARD_THRESHOLD, crawl_stats=None,
+                                    first_crawl_pages=None, request_budget=None):
+    """
+    Async counterpart of scrape_workday_jobs: crawls many tenants at once over
+    a pooled keep-alive session and returns the same list of jobPostings.
+
+    Args:
+        base_urls: List of Workday jobs URLs (with query filter)
+        search_text: Optional search keyword
+        max_jobs: Maximum number of jobs to return (None = all jobs)
+        max_pages: Page cap per tenant (None = every page)
+        max_concurrency: Requests in flight across all tenants
+        per_tenant_concurrency: Requests in flight against a single tenant host
+        per_tenant_delay: Minimum seconds between request starts on one host
+        timeout: Total timeout per request in seconds
+        high_water_marks: Optional dict from utils.workday_state, used and
+            updated in place exactly as in scrape_workday_jobs
+        shard_threshold: Uncapped (max_pages=None) full crawls of tenants larger
+            than this are split into facet partitions fetched in parallel
+        crawl_stats: Optional dict filled in place with base_url ->
+            {requests, errors, latency, jobs}, e.g. for RecrawlScheduler.record
+        first_crawl_pages: Page cap for tenants without a high-water mark yet
+        request_budget: Stop sending requests after this many (None = no limit);
+            tenants cut short are flagged 'budget_cut' in crawl_stats
+    """
+    marks = high_water_marks if high_water_marks is not None else {}
+    results = await _run_async_crawl(base_urls, search_text, max_pages, max_concurrency,
+                                     per_tenant_concurrency, per_tenant_delay, timeout, marks,
+                                     shard_threshold=shard_threshold, crawl_stats=crawl_stats,
+                                     first_crawl_pages=first_crawl_pages, request_budget=request_budget)
+
+    # Keep the input tenant order so the output matches the sequential crawler
+    all_jobs = []
+    for url, (tenant_jobs, complete) in zip(base_urls, results):
+        if max_jobs and len(all_jobs) + len(tenant_jobs) > max_jobs:
+            all_jobs.extend(tenant_jobs[:max_jobs - len(all_jobs)])
+            print(f"Reached maximum job limit ({max_jobs})")
+            break
+        all_jobs.extend(tenant_jobs)
+        if high_water_marks is not None:
+            update_high_water_mark(high_water_marks, url, tenant_jobs, complete)
+    return all_jobs
+
+
+async def aiter_workday_pages(base_urls, search_text="", max_pages=2, max_concurrency=20,
+                              per_tenant_concurrency=2, per_tenant_delay=0.5, timeout=30,
+                              high_water_marks=None, shard_threshold=SHARD_THRESHOLD, crawl_stats=None,
+                              process_page=None, process_window=None, first_crawl_pages=None,
+                              request_budget=None):
+    """
+    Async generator yielding (base_url, jobs) pages in arrival order while the
+    concurrent crawl is still running. Arguments match scrape_workday_jobs_async.
+
+    `process_page`, if given, is an async callable run on each (base_url, jobs)
+    page before it is yielded (e.g. WorkdayDetailFetcher.enrich). Up to
+    `process_window` pages (default max_concurrency) are processed at once,
+    across tenants, and they are still yielded in arrival order.
+
+    Pages are not kept once yielded. A tenant's high-water mark is updated
+    as soon as the caller has taken the tenant's last page, so stopping
+    early never marks postings the caller did not receive.
+    """
+    marks = high_water_marks if high_water_marks is not None else {}
+    queue = asyncio.Queue()
+    done = object()
+    tenant_done = object()
+
+    async def crawl():
+        try:
+            await _run_async_crawl(base_urls, search_text, max_pages, max_concurrency,
+                                   per_tenant_concurrency, per_tenant_delay, timeout, marks,
+                                   on_page=lambda url, jobs: queue.put_nowait((url, jobs)),
+                                   shard_threshold=shard_threshold, crawl_stats=crawl_stats,
+                                   on_tenant_done=lambda url, jobs, complete:
+                                       queue.put_nowait((tenant_done, url, jobs, complete)),
+                                   first_crawl_pages=first_crawl_pages, request_budget=request_budget)
+        finally:
+            queue.put_nowait(done)
+
+    window = process_window or max_concurrency
+    # Pages (url, jobs, processing task) and tenant-done items in arrival order
+    pending = deque()
+    pages_pending = 0
+    crawl_finished = False
+    getter = None
+
+    task = asyncio.create_task(crawl())
+    try:
+        while pending or not crawl_finished:
+            # Hand out the front of the line as far as it is ready; with the
+            # window full (or the crawl over) wait for the front page instead
+            while pending:
+                head = pending[0]
+                if head[0] is tenant_done:
+                    # Queued after the tenant's pages, so all of them have been yielded
+                    pending.popleft()
+                    _, url, first_jobs, complete = head
+                    if high_water_marks is not None:
+                        update_high_water_mark(high_water_marks, url, first_jobs, complete)
+                    continue
+                url, jobs, processing = head
+                if processing is not None and not processing.done() \
+                        and not crawl_finished and pages_pending < window:
+                    break
+                if processing is not None:
+                    await processing
+                pending.popleft()
+                pages_pending -= 1
+                yield url, jobs
+            if crawl_finished:
+                continue
+
+            getter = getter or asyncio.ensure_future(queue.get())
+            waiting = {getter}
+            if pending:
+                waiting.add(pending[0][2])
+            await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                continue
+            item, getter = getter.result(), None
+            if item is done:
+                crawl_finished = True
+            elif item[0] is tenant_done:
+                pending.append(item)
+            else:
+                url, jobs = item
+                processing = asyncio.ensure_future(process_page(url, jobs)) if process_page else None
+                pending.append((url, jobs, processing))
+                pages_pending += 1
+        await task
+    finally:
+        for pending_task in [getter, task] + [item[2] for item in pending if item[0] is not tenant_done]:
+            if pending_task is not None and not pending_task.done():
+                pending_task.cancel()
+
+
+def job_detail_url(base_url, external_path):
+    """Resolve a posting's externalPath against the tenant's CXS job endpoint"""
+    tenant = tenant_key(base_url)
+    if tenant.endswith('/jobs'):
+        tenant = tenant[:-len('/jobs')]
+    return f"{tenant}{external_path}"
+
+
+class WorkdayDetailFetcher:
+    """
+    Fetches jobPostingInfo (description, time type, ...) for postings over a
+    pooled keep-alive session, paced per host like the list crawler. With a
+    DetailCache, a posting whose list-level fields are unchanged since it was
+    cached is served from disk, so each posting costs one request ever.
+    """
+
+    def __init__(self, cache=None, max_concurrency=20, per_tenant_concurrency=2,
+                 per_tenant_delay=0.5, timeout=30):
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.per_tenant_concurrency = per_tenant_concurrency
+        self.timeout = timeout
+        self.pacer = HostPacer(per_host_concurrency=per_tenant_concurrency, min_interval=per_tenant_delay)
+        self.global_limit = None
+        self.session = None
+        self.fetched = 0
+        self.cached = 0
+        self.errors = 0
+
+    async def __aenter__(self):
+        self.global_limit = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_tenant_concurrency)
+        self.session = aiohttp.ClientSession(headers=WORKDAY_HEADERS, connector=connector,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        if self.cache:
+            self.cache.commit()
+        print(f"Job details: {self.fetched} fetched, {self.cached} from cache, {self.errors} failed")
+
+    async def fetch_detail(self, base_url, job):
+        external_path = job.get('externalPath')
+        if not external_path:
+            return None
+        tenant = tenant_key(base_url)
+        fingerprint = posting_fingerprint(job)
+        if self.cache:
+            detail = self.cache.get(tenant, external_path, fingerprint)
+            if detail is not None:
+                self.cached += 1
+                return detail
+
+        url = job_detail_url(base_url, external_path)
+        host = urlsplit(url).netloc
+        async with self.pacer.semaphore(host):
+            await self.pacer.wait(host)
+            async with self.global_limit:
+                async with self.session.get(url) as response:
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+
+        detail = data.get('jobPostingInfo', data)
+        if self.cache:
+            self.cache.put(tenant, external_path, fingerprint, detail)
+        self.fetched += 1
+        return detail
+
+    async def enrich(self, base_url, jobs):
+        """Attach `jobPostingInfo` to each posting of one tenant in place and return the list"""
+        details = await asyncio.gather(*(self.fetch_detail(base_url, job) for job in jobs),
+                                       return_exceptions=True)
+        for job, detail in zip(jobs, details):
+            if isinstance(detail, Exception):
+                self.errors += 1
+                print(f"Error fetching detail for {job.get('externalPath')} from {base_url}: {detail}")
+                continue
+            if detail is not None:
+                job['jobPostingInfo'] = detail
+        if self.cache:
+            self.cache.commit()
+        return jobs
+
+
+class JobStreamWriter:
+    """
+    Append-only sinks for a running crawl: every page goes to a JSONL file (one
+    posting per line) and to the text report as soon as it arrives. Files are
+    flushed and fsync'd every `fsync_every` pages, so a crash loses at most
+    the pages since the last checkpoint.
+    """
+
+    def __init__(self, jsonl_filename="workday_jobs.jsonl", txt_filename="workday_jobs.txt", fsync_every=5):
+        self.jsonl_filename = jsonl_filename
+        self.txt_filename = txt_filename
+        self.fsync_every = fsync_every
+        self.total = 0
+        self._pages_since_sync = 0
+        self._jsonl = None
+        self._txt = None
+
+    def __enter__(self):
+        self._jsonl = open(self.jsonl_filename, 'a', encoding='utf-8')
+        self._txt = open(self.txt_filename, 'w', encoding='utf-8')
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._txt.write(f"Workday Job Listings\n")
+        self._txt.write(f"Scraped on: {timestamp}\n")
+        self._txt.write("=" * 80 + "\n\n")
+        return self
+
+    def write_page(self, jobs):
+        for job in jobs:
+            self.total += 1
+            self._jsonl.write(json.dumps(job, ensure_ascii=False) + "\n")
+            self._txt.write(format_job(self.total, job))
+        self._pages_since_sync += 1
+        if self._pages_since_sync >= self.fsync_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        for f in (self._jsonl, self._txt):
+            f.flush()
+            os.fsync(f.fileno())
+        self._pages_since_sync = 0
+
+    def __exit__(self, exc_type, exc, tb):
+        # The total is only known at the end, so it goes in a footer
+        self._txt.write(f"Total jobs: {self.total}\n")
+        self.checkpoint()
+        self._jsonl.close()
+        self._txt.close()
+        print(f"\nStreamed {self.total} jobs to {self.jsonl_filename} and {self.txt_filename}")
+
+
+def format_job(idx, job):
+    """Render one posting as a block of the text report"""
+    title = job.get('title', 'N/A')
+    location = job.get('locationsText', 'N/A')
+    posted_date = job.get('postedOn', 'N/A')
+    
+    bullet_fields = job.get('bulletFields', [])
+    if bullet_fields:
+        if isinstance(bullet_fields[0], dict):
+            job_id = bullet_fields[0].get('value', 'N/A')
+        else:
+            job_id = bullet_fields[0]
+    else:
+        job_id = 'N/A'
+    
+    external_path = job.get('externalPath', '')
+    full_url = f"{external_path}" if external_path else 'N/A'
+    
+    return (
+        f"Job #{idx}\n"
+        f"Title: {title}\n"
+        f"Location: {location}\n"
+        f"Posted: {posted_date}\n"
+        f"Job ID: {job_id}\n"
+        f"URL: {full_url}\n"
+        + "-" * 80 + "\n\n"
+    )
+
+
+def save_jobs_to_file(jobs, filename="workday_jobs.txt", heading="Workday Job Listings"):
     """Save jobs to a formatted text file"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     with open(filename, 'w', encoding='utf-8') as f:
-        f.write(f"Workday Job Listings\n")
+        f.write(f"{heading}\n")
         f.write(f"Scraped on: {timestamp}\n")
         f.write(f"Total jobs: {len(jobs)}\n")
         f.write("=" * 80 + "\n\n")
         
         for idx, job in enumerate(jobs, 1):
-            title = job.get('title', 'N/A')
-            location = job.get('locationsText', 'N/A')
-            posted_date = job.get('postedOn', 'N/A')
-            
-            bullet_fields = job.get('bulletFields', [])
-            if bullet_fields:
-                if isinstance(bullet_fields[0], dict):
-                    job_id = bullet_fields[0].get('value', 'N/A')
-                else:
-                    job_id = bullet_fields[0]
-            else:
-                job_id = 'N/A'
-            
-            external_path = job.get('externalPath', '')
-            full_url = f"{external_path}" if external_path else 'N/A'
-            
-            f.write(f"Job #{idx}\n")
-            f.write(f"Title: {title}\n")
-            f.write(f"Location: {location}\n")
-            f.write(f"Posted: {posted_date}\n")
-            f.write(f"Job ID: {job_id}\n")
-            f.write(f"URL: {full_url}\n")
-            f.write("-" * 80 + "\n\n")
+            f.write(format_job(idx, job))
     
     print(f"\nJobs saved to {filename}")
 
@@ -115,20 +770,89 @@ def save_jobs_to_json(jobs, filename="workday_jobs.json"):
 
 
 if __name__ == "__main__":
-    # Load formatted URLs from CSV
-    df_urls = pd.read_csv("formatted_urls.csv")
-    df_urls.columns = df_urls.columns.str.strip()
-    base_urls = df_urls['Formatted_URL'].dropna().tolist()
+    # Load tenant CXS URLs from the registry built by workday_url_formatter.py
+    base_urls = load_tenant_urls()
     print(f"Loaded {len(base_urls)} Workday job URLs to scrape.")
+    if not base_urls:
+        print("The tenant registry is empty. Run workday_url_formatter.py first; it also imports "
+              "an existing formatted_urls.csv.")
     
     # Configuration
     SEARCH_TEXT = ""  # optional search term
     MAX_JOBS = None   # set to limit, or None for all jobs
+    # async/streaming only: page cap per tenant. None walks every page, which
+    # facet sharding needs to reach past Workday's pagination ceiling
+    MAX_PAGES = None
+    USE_ASYNC = True  # crawl tenants concurrently over pooled connections
+    MAX_CONCURRENCY = 20         # requests in flight across all tenants
+    PER_TENANT_CONCURRENCY = 2   # requests in flight per tenant host
+    INCREMENTAL = True  # stop each tenant at the newest posting seen last run
+    SCHEDULED = True    # async/streaming only: crawl just the tenants that are due, busiest first
+    REQUEST_BUDGET = 500  # requests per run across the scheduled tenants, enforced while crawling (None = no limit)
+    
+    STREAM_OUTPUT = True  # append each page to workday_jobs.jsonl as it arrives
+    FETCH_DETAILS = True  # streaming mode only: attach jobPostingInfo (description) to each posting
+    
+    high_water_marks = load_high_water_marks() if INCREMENTAL else None
+    
+    # Per-tenant stats feed the scheduler; with INCREMENTAL on, each tenant's
+    # job count is exactly the postings that are new since its last crawl
+    scheduler = RecrawlScheduler() if SCHEDULED and (STREAM_OUTPUT or USE_ASYNC) else None
+    crawl_stats = {}
+    # First crawls are capped at the size the scheduler charges them
+    first_crawl_pages = scheduler.first_crawl_pages if scheduler else None
+    request_budget = REQUEST_BUDGET if scheduler else None
+    if scheduler:
+        base_urls = scheduler.due(base_urls, REQUEST_BUDGET)
+    
+    async def stream_to_files():
+        detail_cache = DetailCache() if FETCH_DETAILS else None
+        try:
+            async with WorkdayDetailFetcher(cache=detail_cache, max_concurrency=MAX_CONCURRENCY,
+                                            per_tenant_concurrency=PER_TENANT_CONCURRENCY) as fetcher:
+                with JobStreamWriter("workday_jobs.jsonl", "workday_jobs.txt") as writer:
+                    # Details for many pages are fetched at once; pages still reach the writer in order
+                    async for base_url, page_jobs in aiter_workday_pages(
+                        base_urls, search_text=SEARCH_TEXT, max_pages=MAX_PAGES,
+                        max_concurrency=MAX_CONCURRENCY, per_tenant_concurrency=PER_TENANT_CONCURRENCY,
+                        high_water_marks=high_water_marks, crawl_stats=crawl_stats,
+                        process_page=fetcher.enrich if FETCH_DETAILS else None,
+                        first_crawl_pages=first_crawl_pages, request_budget=request_budget
+                    ):
+                        writer.write_page(page_jobs)
+        finally:
+            if detail_cache:
+                detail_cache.close()
+        return writer.total
     
     # Scrape jobs
-    jobs = scrape_workday_jobs(base_urls, search_text=SEARCH_TEXT, max_jobs=MAX_JOBS)
+    if STREAM_OUTPUT:
+        total = asyncio.run(stream_to_files())
+        jobs = None
+    elif USE_ASYNC:
+        jobs = asyncio.run(scrape_workday_jobs_async(
+            base_urls, search_text=SEARCH_TEXT, max_jobs=MAX_JOBS, max_pages=MAX_PAGES,
+            max_concurrency=MAX_CONCURRENCY, per_tenant_concurrency=PER_TENANT_CONCURRENCY,
+            high_water_marks=high_water_marks, crawl_stats=crawl_stats,
+            first_crawl_pages=first_crawl_pages, request_budget=request_budget
+        ))
+    else:
+        jobs = scrape_workday_jobs(base_urls, search_text=SEARCH_TEXT, max_jobs=MAX_JOBS,
+                                   high_water_marks=high_water_marks)
+    
+    if high_water_marks is not None:
+        save_high_water_marks(high_water_marks)
+    
+    if scheduler:
+        for url, stats in crawl_stats.items():
+            # Tenants the budget cut short stay due and are crawled next run
+            if not stats.get('budget_cut'):
+                scheduler.record(url, stats)
+        scheduler.close()
     
-    if jobs:
+    if STREAM_OUTPUT:
+        print(f"\nTotal jobs scraped: {total}")
+    elif jobs:
         save_jobs_to_file(jobs, "workday_jobs.txt")
         save_jobs_to_json(jobs, "workday_jobs.json")
         print(f"\nTotal jobs scraped: {len(jobs)}")
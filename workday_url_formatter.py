@@ -1,37 +1,120 @@
+import os
+import sqlite3
 import pandas as pd
-import re
-
-# Read original CSV
-df = pd.read_csv("search_results_1.csv")
-df.columns = df.columns.str.strip()
-
-base_urls = {}
-
-for url in df['URL']:
-    if pd.isna(url):
-        continue
-
-    # Extract company name for deduplication
-    match_company = re.match(r'https://([^.]+)\.wd', url)
-    if not match_company:
-        continue
-    company = match_company.group(1)
-
-    # Extract CareerSite from URL
-    # Look for the segment after the locale (en-US, zh-CN, fr-CA, etc.) and before /job/
-    match_career_site = re.match(r'https://[^/]+/(?:[a-z]{2}-[A-Z]{2})/([^/]+)/job/', url)
-    if not match_career_site:
-        # fallback: try without locale
-        match_career_site = re.match(r'https://[^/]+/([^/]+)/job/', url)
-    if match_career_site:
-        career_site = match_career_site.group(1)
-        # Build canonical URL
-        canonical_url = f"https://{company}.wd3.myworkdayjobs.com/wday/cxs/{company}/{career_site}/jobs?$filter=postedOn ge 2025-11-11&$orderby=postedOn desc"
-        base_urls[company] = canonical_url  # deduplicate by company
-
-# Save to CSV
-formatted_urls = list(base_urls.values())
-df_out = pd.DataFrame(formatted_urls, columns=['Formatted_URL'])
-df_out.to_csv("formatted_urls_corrected.csv", index=False)
-
-print(f"Formatted URLs saved to formatted_urls_corrected.csv ({len(formatted_urls)} unique URLs).")
+from utils.serp_store import SERP_DB
+from utils.tenant_registry import TenantRegistry
+
+# Older SERP exports; read in full (the upsert makes re-reading harmless)
+LEGACY_CSV = "search_results_1.csv"
+# Tenant list the crawler used to read, CXS URLs under a Formatted_URL column
+FORMATTED_CSV = "formatted_urls.csv"
+
+# Career site URLs on a tenant's own shard host, e.g.
+#   https://acme.wd5.myworkdayjobs.com/en-US/External/job/Toronto/Analyst_R123
+WORKDAY_JOBS_RE = (
+    r'^https?://(?P<host>(?P<company>[^./]+)\.wd\d+\.myworkdayjobs\.com)'
+    r'/(?:[a-z]{2}-[A-Z]{2}/)?(?P<career_site>[^/?#]+)'
+)
+# Career sites served from a shared myworkdaysite.com host, e.g.
+#   https://wd3.myworkdaysite.com/en-US/recruiting/acme/External/job/Analyst_R123
+WORKDAY_SITE_RE = (
+    r'^https?://(?P<host>wd\d+\.myworkdaysite\.com)'
+    r'/(?:[a-z]{2}-[A-Z]{2}/)?recruiting/(?P<company>[^/?#]+)/(?P<career_site>[^/?#]+)'
+)
+# CXS jobs URLs themselves, e.g. from formatted_urls.csv:
+#   https://acme.wd3.myworkdayjobs.com/wday/cxs/acme/External/jobs?$filter=...
+CXS_JOBS_RE = (
+    r'^https?://(?P<host>[^/?#]+)/wday/cxs/(?P<company>[^/?#]+)/(?P<career_site>[^/?#]+)/jobs'
+)
+# Path segments that sit where a career site would but are not one
+NOT_CAREER_SITES = ['wday', 'recruiting', 'job', 'details']
+
+
+def normalize_workday_urls(urls):
+    """
+    Turn Workday posting URLs into CXS jobs URLs in one vectorised pass.
+
+    Parameters:
+    - urls (pd.Series): Raw result URLs (non-Workday URLs are dropped).
+
+    Returns:
+    - pd.DataFrame: base_url, company, host, career_site, source_url; one row per base_url.
+    """
+    urls = urls.dropna().astype(str).str.strip()
+    # Rows the first pattern misses get a second chance with the shared-host one
+    parts = urls.str.extract(WORKDAY_JOBS_RE).combine_first(urls.str.extract(WORKDAY_SITE_RE))
+    parts['host'] = parts['host'].str.lower()
+    parts['company'] = parts['company'].str.lower()
+    parts['source_url'] = urls
+    parts = parts.dropna(subset=['host', 'company', 'career_site'])
+    parts = parts[~parts['career_site'].str.lower().isin(NOT_CAREER_SITES)]
+    parts['base_url'] = ("https://" + parts['host'] + "/wday/cxs/" + parts['company']
+                         + "/" + parts['career_site'] + "/jobs")
+    return (parts[['base_url', 'company', 'host', 'career_site', 'source_url']]
+            .drop_duplicates(subset='base_url')
+            .reset_index(drop=True))
+
+
+def normalize_cxs_urls(urls):
+    """
+    Parse already formatted CXS jobs URLs into registry rows, dropping any
+    query string (date filters went stale; ordering is added per request).
+
+    Parameters:
+    - urls (pd.Series): CXS jobs URLs.
+
+    Returns:
+    - pd.DataFrame: Same columns as normalize_workday_urls.
+    """
+    urls = urls.dropna().astype(str).str.strip()
+    parts = urls.str.extract(CXS_JOBS_RE)
+    parts['host'] = parts['host'].str.lower()
+    parts['source_url'] = urls
+    parts = parts.dropna(subset=['host', 'company', 'career_site'])
+    parts['base_url'] = ("https://" + parts['host'] + "/wday/cxs/" + parts['company']
+                         + "/" + parts['career_site'] + "/jobs")
+    return (parts[['base_url', 'company', 'host', 'career_site', 'source_url']]
+            .drop_duplicates(subset='base_url')
+            .reset_index(drop=True))
+
+
+def read_new_serp_urls(registry, filename=SERP_DB):
+    """Return (urls, last_id) for SERP results stored since the registry last read them"""
+    conn = sqlite3.connect(filename)
+    try:
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM serp_results').fetchone()[0]
+        df = pd.read_sql_query(
+            "SELECT url FROM serp_results WHERE id > ? AND id <= ? AND url LIKE '%myworkday%'",
+            conn, params=(registry.cursor(filename), last_id)
+        )
+    finally:
+        conn.close()
+    return df['url'], last_id
+
+
+if __name__ == "__main__":
+    registry = TenantRegistry()
+    try:
+        if os.path.exists(SERP_DB):
+            urls, last_id = read_new_serp_urls(registry)
+            tenants = normalize_workday_urls(urls)
+            added = registry.upsert(tenants.itertuples(index=False, name=None), source=SERP_DB, last_id=last_id)
+            print(f"{SERP_DB}: {len(urls)} new Workday results, {len(tenants)} tenants, {added} new.")
+
+        if os.path.exists(LEGACY_CSV):
+            df = pd.read_csv(LEGACY_CSV)
+            df.columns = df.columns.str.strip()
+            tenants = normalize_workday_urls(df['URL'])
+            added = registry.upsert(tenants.itertuples(index=False, name=None))
+            print(f"{LEGACY_CSV}: {len(tenants)} tenants, {added} new.")
+
+        if os.path.exists(FORMATTED_CSV):
+            df = pd.read_csv(FORMATTED_CSV)
+            df.columns = df.columns.str.strip()
+            tenants = normalize_cxs_urls(df['Formatted_URL'])
+            added = registry.upsert(tenants.itertuples(index=False, name=None))
+            print(f"{FORMATTED_CSV}: {len(tenants)} tenants, {added} new.")
+
+        print(f"Tenant registry now holds {len(registry)} Workday tenants.")
+    finally:
+        registry.close()